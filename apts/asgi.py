@@ -3,6 +3,14 @@ ASGI config for apts project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The AI assistant views are native async views, so run the project with an
+ASGI server to keep model calls off the worker threads, e.g.:
+
+    uvicorn apts.asgi:application --workers 4
+
+The rest of the site runs unchanged under ASGI; the CSV exports hand Django
+async iterators there, so they still stream instead of being buffered.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
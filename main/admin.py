@@ -1,5 +1,60 @@
 from django.contrib import admin
+from django.db.models import Count, Q
+
 from .models import Profile, Mentor, Student, Semester, Placement
+from .pagination import CachedCountPaginator
+from .search import search_placements, search_students
+from .stats import branch_names
+from .versioning import versioned_cache
+
+
+# -------------------------
+# Scalable changelists
+# -------------------------
+class ScalableChangeList:
+    """
+    Changelist options for the large tables: the page count comes from a
+    cached COUNT(*) (until the data changes) and the unfiltered total is
+    not counted at all.
+    """
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+class BranchListFilter(admin.SimpleListFilter):
+    # the branch list comes from the per-branch stats rows, not a DISTINCT over students
+    title = 'branch'
+    parameter_name = 'branch'
+
+    def lookups(self, request, model_admin):
+        return [(b, b) for b in branch_names()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(branch=self.value())
+        return queryset
+
+
+class CompanyListFilter(admin.SimpleListFilter):
+    # only the most frequent companies (cached until the data changes):
+    # listing every distinct company does not scale
+    title = 'company'
+    parameter_name = 'company'
+    limit = 25
+
+    def lookups(self, request, model_admin):
+        def top_companies():
+            return list(
+                Placement.objects.values('company').annotate(n=Count('id'))
+                .order_by('-n', 'company').values_list('company', flat=True)[:self.limit]
+            )
+        return [(c, c) for c in sorted(versioned_cache('admin:companies', ['global'], top_companies))]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(company=self.value())
+        return queryset
+
 
 # -------------------------
 # Profile Admin
@@ -47,25 +102,45 @@ class SemesterInline(admin.TabularInline):
 # Student Admin
 # -------------------------
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(ScalableChangeList, admin.ModelAdmin):
     list_display = ('name', 'email', 'branch', 'mentor', 'cgpa', 'display_semesters', 'display_top_offer')
-    search_fields = ('name', 'email', 'branch', 'mentor__name')
-    list_filter = ('branch', 'mentor')
+    list_select_related = ('mentor',)
+    search_fields = ('name', 'email')
+    list_filter = (BranchListFilter, 'mentor')
     inlines = [PlacementInline, SemesterInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_top_offer().prefetch_related('semesters')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Every word must match: the name / email by indexed word prefix
+        # (main.search) instead of an icontains scan, or the branch or
+        # mentor name, looked up in their own small tables.
+        if not search_term:
+            return queryset, False
+        branches = branch_names()
+        condition = Q()
+        for word in search_term.split():
+            condition &= (
+                search_students(word)
+                | Q(branch__in=[b for b in branches if word.lower() in b.lower()])
+                | Q(mentor__in=Mentor.objects.filter(name__icontains=word).values('id'))
+            )
+        return queryset.filter(condition), False
+
     def display_semesters(self, obj):
-        """Display semester GPAs from related Semester objects"""
-        semesters = obj.semesters.all().order_by('semester_number')
-        if semesters.exists():
+        """Display semester GPAs from the prefetched Semester rows"""
+        semesters = obj.semesters.all()
+        if semesters:
             return ", ".join([f"Sem {s.semester_number}: {s.gpa}" for s in semesters])
         return "-"
     display_semesters.short_description = 'Semester GPAs'
 
     def display_top_offer(self, obj):
-        """Show top accepted placement"""
-        top = obj.top_offer  # Assuming Student model has a top_offer property
+        """Show top accepted placement (from the placement summary)"""
+        top = obj.top_offer
         if top:
-            return f"{top.company} ({top.package})"
+            return f"{top.company} ({top.package} {top.package_unit})"
         return "-"
     display_top_offer.short_description = 'Top Offer'
 
@@ -74,18 +149,25 @@ class StudentAdmin(admin.ModelAdmin):
 # Placement Admin
 # -------------------------
 @admin.register(Placement)
-class PlacementAdmin(admin.ModelAdmin):
+class PlacementAdmin(ScalableChangeList, admin.ModelAdmin):
     list_display = ('student', 'company', 'position', 'package', 'package_unit', 'status', 'created_at')
+    list_select_related = ('student',)
     search_fields = ('student__name', 'company', 'position')
-    list_filter = ('status', 'company')
-    ordering = ('-created_at',)
+    list_filter = ('status', CompanyListFilter)
+    ordering = ('-created_at', '-id')  # placement_created_id_idx
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(search_placements(search_term)), False
 
 # -------------------------
 # Semester Admin
 # -------------------------
 @admin.register(Semester)
-class SemesterAdmin(admin.ModelAdmin):
+class SemesterAdmin(ScalableChangeList, admin.ModelAdmin):
     list_display = ('student', 'semester_number', 'gpa')
+    list_select_related = ('student',)
     search_fields = ('student__name',)
     list_filter = ('semester_number',)
     ordering = ('semester_number',)
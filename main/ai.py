@@ -0,0 +1,158 @@
+"""
+AI provider layer for the assistant views.
+
+Both AI views call ``generate()`` / ``stream()`` here, which delegate to
+the backend selected by ``AI_PROVIDER``:
+
+* ``"gemini"`` - Google Gemini through the SDK's async client. The SDK is
+  imported and the client built on first use, then reused (one client,
+  and so one HTTP connection pool, per event loop).
+* ``"fake"`` - deterministic local backend with ``AI_FAKE_LATENCY``
+  seconds of simulated latency, for tests, load tests and offline work.
+* a dotted path to any ``AIProvider`` subclass.
+
+The number of concurrent calls per event loop is capped by
+``AI_MAX_CONCURRENT_REQUESTS``.
+"""
+import asyncio
+import hashlib
+import weakref
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_MODEL = "models/gemini-2.5-flash"
+
+
+class AIBusyError(Exception):
+    """Raised when no AI call slot frees up within AI_QUEUE_TIMEOUT seconds."""
+
+
+class AIProvider:
+    """Interface implemented by every AI backend."""
+
+    async def generate(self, contents):
+        """Return the full reply text for `contents` (or None)."""
+        raise NotImplementedError
+
+    async def stream(self, contents):
+        """Async generator yielding the reply text chunk by chunk."""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+
+class GeminiProvider(AIProvider):
+    def __init__(self, api_key=None, model=None):
+        self.api_key = api_key or settings.GEMINI_API_KEY
+        self.model = model or getattr(settings, "AI_MODEL", DEFAULT_MODEL)
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        # The SDK's async HTTP pool is bound to the loop it first ran on, so
+        # keep one client per loop (a single one when served through ASGI).
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from google import genai  # slow import; only pay it when the AI is used
+
+            client = genai.Client(api_key=self.api_key)
+            self._clients[loop] = client
+        return client
+
+    async def generate(self, contents):
+        response = await self.client.aio.models.generate_content(model=self.model, contents=contents)
+        return response.text if hasattr(response, "text") else None
+
+    async def stream(self, contents):
+        async for chunk in await self.client.aio.models.generate_content_stream(model=self.model, contents=contents):
+            if getattr(chunk, "text", None):
+                yield chunk.text
+
+
+class FakeProvider(AIProvider):
+    """Offline backend: the reply depends only on the prompt, after a fixed delay."""
+
+    def __init__(self, latency=None, chunks=5):
+        self.latency = getattr(settings, "AI_FAKE_LATENCY", 0.0) if latency is None else latency
+        self.chunks = chunks
+
+    def reply_for(self, contents):
+        digest = hashlib.sha256(contents.encode()).hexdigest()[:12]
+        return f"<p>Fake AI reply for a {len(contents)}-character prompt (digest {digest}).</p>"
+
+    async def generate(self, contents):
+        await asyncio.sleep(self.latency)
+        return self.reply_for(contents)
+
+    async def stream(self, contents):
+        reply = self.reply_for(contents)
+        size = -(-len(reply) // self.chunks)
+        for start in range(0, len(reply), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield reply[start:start + size]
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "fake": FakeProvider,
+}
+
+_provider = None
+
+
+def get_provider():
+    """Return the configured provider, creating it on first use."""
+    global _provider
+    if _provider is None:
+        name = getattr(settings, "AI_PROVIDER", "gemini")
+        provider_class = PROVIDERS.get(name) or import_string(name)
+        _provider = provider_class()
+    return _provider
+
+
+def reset_provider():
+    """Forget the cached provider (after changing AI_* settings, e.g. in tests)."""
+    global _provider
+    _provider = None
+
+
+# asyncio primitives belong to one event loop, so keep a semaphore per loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _call_slots():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(getattr(settings, "AI_MAX_CONCURRENT_REQUESTS", 4))
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _acquire_slot():
+    semaphore = _call_slots()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=getattr(settings, "AI_QUEUE_TIMEOUT", 30))
+    except asyncio.TimeoutError:
+        raise AIBusyError("Too many AI requests in flight.")
+    return semaphore
+
+
+async def generate(contents):
+    """Send `contents` to the model and return the reply text (or None)."""
+    semaphore = await _acquire_slot()
+    try:
+        return await get_provider().generate(contents)
+    finally:
+        semaphore.release()
+
+
+async def stream(contents):
+    """Async generator yielding the reply text chunk by chunk as the model produces it."""
+    semaphore = await _acquire_slot()
+    try:
+        async for text in get_provider().stream(contents):
+            yield text
+    finally:
+        semaphore.release()
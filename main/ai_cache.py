@@ -0,0 +1,93 @@
+"""
+In-process LRU/TTL cache for AI assistant replies.
+
+Entries are keyed on the endpoint, the normalized prompt and the current
+data-version token (main.versioning), so a repeat question is answered
+without a model call and an answer never outlives a data change.
+
+Every ``AI_CACHE_LOG_EVERY`` lookups the hit / miss / eviction counters of
+this worker are logged to ``main.ai_cache``.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt):
+    """Case- and whitespace-insensitive form of a question."""
+    return " ".join(prompt.lower().split())
+
+
+class AnswerCache:
+    def __init__(self, max_entries=256, ttl=3600, log_every=100):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.log_every = log_every
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint, prompt, version):
+        return (endpoint, normalize_prompt(prompt), version)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                value = None
+            lookups = self.hits + self.misses
+        if self.log_every and lookups % self.log_every == 0:
+            self.log_stats()
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(
+            "AI answer cache: entries=%(entries)d hits=%(hits)d misses=%(misses)d "
+            "evictions=%(evictions)d hit_rate=%(hit_rate).3f", stats, extra=stats,
+        )
+
+
+answers = AnswerCache(
+    max_entries=getattr(settings, "AI_CACHE_MAX_ENTRIES", 256),
+    ttl=getattr(settings, "AI_CACHE_TTL", 3600),
+    log_every=getattr(settings, "AI_CACHE_LOG_EVERY", 100),
+)
@@ -0,0 +1,233 @@
+"""
+Context builders for the AI assistants.
+
+The TPO assistant gets pre-computed aggregates (per branch, company and
+mentor) plus only the rows relevant to the question, trimmed to
+``AI_CONTEXT_TOKEN_BUDGET``. Every builder runs a fixed number of bulk
+queries, so the pre-AI phase does not grow with the number of students.
+"""
+import json
+import logging
+import re
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Q
+
+from .models import Mentor, Placement, Semester, Student
+from .search import search_students
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # rough estimate used for the prompt budget
+
+# Words that never identify a student, even though they may appear in names
+STOPWORDS = {
+    "about", "above", "accepted", "all", "and", "any", "are", "average", "avg", "below",
+    "best", "branch", "branches", "can", "cgpa", "companies", "company", "compare",
+    "count", "details", "did", "does", "doing", "each", "for", "from", "give", "gpa",
+    "has", "have", "highest", "how", "list", "lowest", "many", "mentor", "mentors",
+    "most", "not", "offer", "offers", "package", "packages", "pending", "percentage",
+    "performance", "placed", "placement", "placements", "please", "rejected", "semester",
+    "show", "student", "students", "summary", "tell", "than", "the", "their", "there",
+    "top", "total", "trend", "trends", "what", "which", "who", "why", "wise", "with",
+}
+
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def _rounded(rows):
+    return [{k: _round(v) for k, v in row.items()} for row in rows]
+
+
+def _mentioned(prompt_text, names):
+    """Names that appear in the prompt as whole words (case-insensitive)."""
+    return [
+        name for name in names
+        if name and re.search(r"\b" + re.escape(name.lower()) + r"\b", prompt_text)
+    ]
+
+
+def _candidate_name_words(prompt, exclude):
+    words = {w.lower() for w in re.findall(r"[A-Za-z][\w'.-]{2,}", prompt)}
+    excluded = {w for name in exclude for w in name.lower().split()}
+    return sorted(words - STOPWORDS - excluded, key=len, reverse=True)[:10]
+
+
+def tpo_aggregates():
+    """Per-branch, per-company and per-mentor statistics (3 queries)."""
+    branches = _rounded(Student.objects.values("branch").annotate(
+        students=Count("id"),
+        placed=Count("id", filter=Q(placement_status=Student.PLACED)),
+        in_progress=Count("id", filter=Q(placement_status=Student.IN_PROGRESS)),
+        avg_cgpa=Avg("cgpa"),
+        highest_package_lpa=Max("top_package_lpa", filter=Q(placement_status=Student.PLACED)),
+    ).order_by("branch"))
+    for b in branches:
+        b["placed_percentage"] = round(100 * b["placed"] / b["students"], 1) if b["students"] else 0
+
+    companies = _rounded(Placement.objects.values("company").annotate(
+        offers=Count("id"),
+        accepted=Count("id", filter=Q(status="Accepted")),
+        pending=Count("id", filter=Q(status="Pending")),
+        avg_package_lpa=Avg("package_lpa"),
+        max_package_lpa=Max("package_lpa"),
+    ).order_by("-offers", "company"))
+
+    mentors = _rounded(Mentor.objects.values("name", "department").annotate(
+        student_count=Count("students"),
+        placed=Count("students", filter=Q(students__placement_status=Student.PLACED)),
+        avg_cgpa=Avg("students__cgpa"),
+    ).order_by("name"))
+
+    overall = {
+        "students": sum(b["students"] for b in branches),
+        "placed": sum(b["placed"] for b in branches),
+        "in_progress": sum(b["in_progress"] for b in branches),
+        "placements": sum(c["offers"] for c in companies),
+    }
+    return {"overall": overall, "branches": branches, "companies": companies, "mentors": mentors}
+
+
+def _student_records(students):
+    """Full academic + placement records for a small list of student value dicts."""
+    ids = [s["id"] for s in students]
+    semesters = defaultdict(list)
+    for sem in Semester.objects.filter(student_id__in=ids).order_by("student_id", "semester_number").values(
+        "student_id", "semester_number", "gpa"
+    ):
+        semesters[sem.pop("student_id")].append(sem)
+    placements = defaultdict(list)
+    for p in Placement.objects.filter(student_id__in=ids).values(
+        "student_id", "company", "position", "package_lpa", "status"
+    ):
+        placements[p.pop("student_id")].append(_rounded([p])[0])
+
+    return [
+        {
+            "name": s["name"],
+            "email": s["email"],
+            "branch": s["branch"],
+            "cgpa": _round(s["cgpa"]),
+            "current_semester": s["current_semester"],
+            "mentor": s["mentor__name"] or "Not Assigned",
+            "placement_status": s["placement_status"],
+            "semesters": semesters.get(s["id"], []),
+            "placements": placements.get(s["id"], []),
+        }
+        for s in students
+    ]
+
+
+def _fit(sections, budget_chars):
+    """
+    Fill `sections` (ordered by priority) row by row until the JSON size
+    reaches the budget; report how many rows of each section were left out.
+    """
+    context, omitted = {}, {}
+    used = 2 + 150  # braces + room for the omitted_rows summary
+    for name, value in sections:
+        key_size = len(json.dumps(name)) + 4  # '"name": ' + ', '
+        if not isinstance(value, list):
+            size = len(json.dumps(value)) + key_size
+            if used + size <= budget_chars:
+                context[name] = value
+                used += size
+            continue
+        kept = []
+        used += key_size + 2
+        for row in value:
+            size = len(json.dumps(row)) + 2
+            if used + size > budget_chars:
+                break
+            kept.append(row)
+            used += size
+        context[name] = kept
+        if len(kept) < len(value):
+            omitted[name] = len(value) - len(kept)
+    if omitted:
+        context["omitted_rows"] = omitted
+    return context
+
+
+def build_tpo_context(prompt):
+    """
+    Aggregates plus the records relevant to `prompt`: students named in it,
+    placements at companies it mentions, and rosters of the branches and
+    mentors it mentions. Bounded by AI_CONTEXT_TOKEN_BUDGET.
+    """
+    aggregates = tpo_aggregates()
+    prompt_text = prompt.lower()
+
+    branches = _mentioned(prompt_text, [b["branch"] for b in aggregates["branches"]])
+    companies = _mentioned(prompt_text, [c["company"] for c in aggregates["companies"]])
+    mentors = _mentioned(prompt_text, [m["name"] for m in aggregates["mentors"]])
+
+    student_fields = ("id", "name", "email", "branch", "cgpa", "current_semester", "mentor__name", "placement_status")
+    named_students = []
+    words = _candidate_name_words(prompt, branches + companies + mentors)
+    if words:
+        # prefix lookups on the search token index, not a LIKE '%word%' scan
+        candidates = Student.objects.filter(search_students(" ".join(words), any_word=True)).values(*student_fields)[:50]
+        named_students = [
+            s for s in candidates
+            if set(s["name"].lower().split()) & set(words)
+        ][:20]
+
+    sections = [("overall", aggregates["overall"]), ("branches", aggregates["branches"])]
+    if named_students:
+        sections.append(("students_mentioned", _student_records(named_students)))
+    if companies:
+        sections.append(("placements_at_mentioned_companies", _rounded(
+            Placement.objects.filter(company__in=companies).order_by("company", "-package_lpa").values(
+                "company", "student__name", "student__branch", "position", "package_lpa", "status"
+            )[:500]
+        )))
+    if branches or mentors:
+        roster = Student.objects.filter(Q(branch__in=branches) | Q(mentor__name__in=mentors))
+        sections.append(("students_in_mentioned_branches_or_mentors", _rounded(
+            roster.order_by("-cgpa").values(
+                "name", "branch", "mentor__name", "cgpa", "placement_status", "top_package_lpa"
+            )[:500]
+        )))
+    sections += [("companies", aggregates["companies"]), ("mentors", aggregates["mentors"])]
+
+    budget_tokens = getattr(settings, "AI_CONTEXT_TOKEN_BUDGET", 12000)
+    context = _fit(sections, budget_tokens * CHARS_PER_TOKEN)
+
+    size = len(json.dumps(context).encode())
+    logger.info(
+        "TPO AI context: %d bytes (~%d tokens, budget %d); matched branches=%s companies=%s mentors=%s students=%d; omitted=%s",
+        size, size // CHARS_PER_TOKEN, budget_tokens, branches, companies, mentors,
+        len(named_students), context.get("omitted_rows", {}),
+    )
+    return context
+
+
+async def abuild_tpo_context(prompt):
+    """Async wrapper: runs the (few) retrieval queries in the ORM's sync thread."""
+    return await sync_to_async(build_tpo_context)(prompt)
+
+
+def build_student_context(student):
+    """A single student's own academic + placement record (2 queries)."""
+    return {
+        "name": student.name,
+        "email": student.email,
+        "branch": student.branch,
+        "cgpa": student.cgpa,
+        "current_semester": student.current_semester,
+        "mentor": student.mentor.name if student.mentor else "No mentor assigned",
+        "semesters": list(student.semesters.all().values("semester_number", "gpa")),
+        "placements": list(student.placements.all().values(
+            "company", "position", "package", "package_unit", "status"
+        ))
+    }
+
+
+async def abuild_student_context(student):
+    """Async wrapper: runs build_student_context()'s queries in the ORM's sync thread."""
+    return await sync_to_async(build_student_context)(student)
@@ -0,0 +1,277 @@
+"""
+Read-only JSON API for the dashboard data (kiosk displays, scripts).
+
+Every response carries an ``ETag`` and a ``Last-Modified`` derived from the
+data-version counters of the scopes it was built from (see
+main.versioning), and ``Cache-Control: private, no-cache`` so clients
+revalidate on every poll. A poll whose ``If-None-Match`` still matches is
+answered 304 after the permission check and one cache round trip, without
+running any of the dashboard queries; a changed version rebuilds the
+payload once and caches it for every other client. The ETag is the only
+validator: Last-Modified has one-second resolution, so two changes within
+a second would look alike, and ``If-Modified-Since`` is ignored.
+
+Common parameters:
+
+* ``fields=a,b`` returns only those keys of each object (400 for unknown
+  ones);
+* list endpoints return ``{"results": [...], "next": ..., "previous": ...}``
+  and take ``cursor`` (from next / previous) and ``limit`` (at most
+  ``MAX_LIMIT``). Cursors are keyset cursors (main.pagination), so deep
+  pages cost the same as the first.
+
+Errors are ``{"error": message}`` with a 4xx status.
+"""
+from functools import wraps
+
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .models import Placement, Student
+from .pagination import InvalidCursor, keyset_page
+from .stats import dashboard_stats
+from .versioning import cached_build, version_key, version_timestamp
+from .views import MENTOR_SORT_KEYS, MENTOR_SORTS, PLACEMENT_SORTS, filter_mentor_students, filter_placements
+
+API_VERSION = "v1"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+COMPACT = {"separators": (",", ":")}
+
+STUDENT_FIELDS = (
+    "id", "name", "email", "branch", "mentor", "cgpa", "attendance", "credits", "current_semester",
+    "placement_status", "accepted_count", "pending_count", "top_offer", "semesters", "placements",
+)
+ROSTER_FIELDS = (
+    "id", "name", "email", "branch", "cgpa", "attendance", "credits", "placement_status",
+    "top_company", "top_position", "top_package_lpa",
+)
+STATS_FIELDS = (
+    "total_students", "placed", "not_placed", "in_progress", "with_pending", "avg_cgpa",
+    "placements", "highest_package", "buckets",
+)
+PLACEMENT_FIELDS = (
+    "id", "student_id", "student_name", "branch", "company", "position", "package", "package_unit",
+    "package_lpa", "status", "created_at",
+)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_error(status, message):
+    return JsonResponse({"error": message}, status=status, json_dumps_params=COMPACT)
+
+
+def api_view(view):
+    """GET/HEAD only; answers 401 instead of redirecting anonymous users, 400 for a BadRequest."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_error(401, "Authentication required.")
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as e:
+            return api_error(400, str(e))
+    return wrapper
+
+
+def user_type(user):
+    profile = getattr(user, "profile", None)
+    return profile.user_type if profile else None
+
+
+# -------------------------
+# Parameters
+# -------------------------
+def selected_fields(request, allowed):
+    """The ?fields= keys in `allowed` order (all of them when absent)."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return allowed
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown or not requested:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(allowed)}.")
+    return tuple(f for f in allowed if f in requested)
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest("limit must be an integer.")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def project(row, fields):
+    return {field: row[field] for field in fields}
+
+
+def roster_row(row):
+    # the dashboard shows (and sorts by) the account name
+    return {**row, "name": f"{row['user__first_name']} {row['user__last_name']}"}
+
+
+def cursor_page(queryset, ordering, cursor, limit, fields, prepare=dict):
+    """
+    One keyset page of `queryset` (.values() dicts, each passed through
+    prepare()) as a list payload.
+    """
+    try:
+        page = keyset_page(queryset, ordering, cursor, per_page=limit)
+    except InvalidCursor as e:
+        raise BadRequest(f"{e} Use the next / previous cursor of an earlier response.")
+    return {
+        "results": [project(prepare(row), fields) for row in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    }
+
+
+# -------------------------
+# Conditional responses
+# -------------------------
+def conditional_json(request, name, scopes, build, *parts):
+    """
+    JSON of build(), or a 304 when the client already has the version of
+    `scopes` it was built from. build() only runs on a cache miss.
+    """
+    key = version_key(f"api:{API_VERSION}:{name}", scopes, *parts)
+    etag = quote_etag(key)
+    last_modified = version_timestamp(key)
+    # ETag only: a Last-Modified second can hide a second change
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(cached_build(key, build), json_dumps_params=COMPACT)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # the payload depends on who is logged in: never share it between users
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+# -------------------------
+# Endpoints
+# -------------------------
+@api_view
+def student_summary(request, student_id):
+    # same access rule as std_dashboard: the student themself or their mentor
+    if hasattr(request.user, "student_profile"):
+        if request.user.student_profile.id != student_id:
+            return api_error(403, "You can only view your own record.")
+    elif hasattr(request.user, "mentor_profile"):
+        if not Student.objects.filter(pk=student_id, mentor=request.user.mentor_profile).exists():
+            return api_error(404, "No such student among your mentees.")
+    else:
+        return api_error(403, "Only students and mentors can view student records.")
+
+    fields = selected_fields(request, STUDENT_FIELDS)
+
+    def build():
+        student = Student.objects.with_top_offer().select_related("mentor").get(pk=student_id)
+        top = student.top_offer
+        row = {
+            "id": student.pk,
+            "name": student.name,
+            "email": student.email,
+            "branch": student.branch,
+            "mentor": student.mentor.name if student.mentor else None,
+            "cgpa": student.cgpa,
+            "attendance": student.attendance,
+            "credits": student.credits,
+            "current_semester": student.current_semester,
+            "placement_status": student.placement_status,
+            "accepted_count": student.accepted_count,
+            "pending_count": student.pending_count,
+            "top_offer": top and {"company": top.company, "position": top.position, "package_lpa": top.package_lpa},
+        }
+        if "semesters" in fields:
+            row["semesters"] = [{"number": s.semester_number, "gpa": s.gpa} for s in student.ensure_semesters()]
+        if "placements" in fields:
+            row["placements"] = list(student.placements.order_by("-created_at", "-id").values(
+                "id", "company", "position", "package", "package_unit", "package_lpa", "status", "created_at",
+            ))
+        return project(row, fields)
+
+    return conditional_json(request, "student", [f"student:{student_id}"], build, student_id, fields)
+
+
+@api_view
+def mentor_roster(request):
+    mentor = getattr(request.user, "mentor_profile", None)
+    if mentor is None:
+        return api_error(403, "Only mentors have a roster.")
+
+    q = request.GET.get("q", "").strip()
+    status_filter = request.GET.get("status", "all")
+    gpa_filter = request.GET.get("gpa", "all")
+    sort = request.GET.get("sort", "name_asc")
+    sort = sort if sort in MENTOR_SORTS else "name_asc"
+    cursor = request.GET.get("cursor")
+    limit = page_limit(request)
+    fields = selected_fields(request, ROSTER_FIELDS)
+
+    def build():
+        # same filters, order and names as the mentor dashboard
+        students = filter_mentor_students(
+            Student.objects.filter(mentor=mentor), q, status_filter, gpa_filter, sort
+        ).values(
+            "id", "email", "branch", "cgpa", "attendance", "credits", "placement_status", "top_package_lpa",
+            "user__first_name", "user__last_name", *MENTOR_SORT_KEYS,
+            top_company=F("top_placement__company"),
+            top_position=F("top_placement__position"),
+        )
+        return cursor_page(students, MENTOR_SORTS[sort], cursor, limit, fields, prepare=roster_row)
+
+    return conditional_json(
+        request, "roster", [f"mentor:{mentor.id}"], build,
+        mentor.id, q, status_filter, gpa_filter, sort, cursor, limit, fields,
+    )
+
+
+@api_view
+def tpo_stats(request):
+    if user_type(request.user) != "tpo":
+        return api_error(403, "Only the TPO can view college statistics.")
+
+    branch = request.GET.get("branch")
+    branch = branch if branch and branch != "all" else None
+    fields = selected_fields(request, STATS_FIELDS)
+
+    def build():
+        return project(dashboard_stats(branch), fields)
+
+    return conditional_json(request, "stats", ["global"], build, branch, fields)
+
+
+@api_view
+def tpo_placements(request):
+    if user_type(request.user) != "tpo":
+        return api_error(403, "Only the TPO can list placements.")
+
+    status = request.GET.get("status")
+    branch = request.GET.get("branch")
+    q = request.GET.get("q", "").strip()
+    ordering = PLACEMENT_SORTS.get(request.GET.get("sort"), PLACEMENT_SORTS["date_desc"])
+    cursor = request.GET.get("cursor")
+    limit = page_limit(request)
+    fields = selected_fields(request, PLACEMENT_FIELDS)
+
+    def build():
+        placements = filter_placements(Placement.objects.all(), status, branch, q).values(
+            "id", "student_id", "company", "position", "package", "package_unit", "package_lpa", "status", "created_at",
+            student_name=F("student__name"),
+            branch=F("student__branch"),
+        )
+        return cursor_page(placements, ordering, cursor, limit, fields)
+
+    return conditional_json(
+        request, "placements", ["global"], build, status, branch, q, ordering, cursor, limit, fields,
+    )
@@ -0,0 +1,164 @@
+"""
+Per-view benchmarks.
+
+run_benchmarks() requests the dashboards, placement list and CSV exports
+through the test client (full middleware, templates and streaming) and
+calls the AI context builders directly, as the synthetic TPO, the busiest
+synthetic mentor and one of their students (see main.synthetic). For each
+target it records the median wall time, the query count and DB time of
+the last run (main.instrumentation.QueryLog) and the peak Python memory
+of one extra run under tracemalloc.
+
+``manage.py benchmark`` wraps this: it can generate colleges of several
+sizes into a throwaway test database, writes the results as JSON together
+with the git commit, and compares them with an earlier result file.
+"""
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .ai_context import build_student_context, build_tpo_context
+from .instrumentation import QueryLog
+from .models import Mentor, Placement, Student
+from .pagination import KeysetPage
+from .synthetic import TPO_USERNAME
+from .versioning import bump_all_versions
+
+TPO_PROMPT = "Compare CSE with ECE. How many offers did Acme make, and who has the highest package?"
+
+# (name, user role, url name, query string)
+VIEW_TARGETS = [
+    ("tpo_dashboard", "tpo", "tpo_dashboard", {}),
+    ("tpo_dashboard status=placed", "tpo", "tpo_dashboard", {"status": "placed", "page": 5}),
+    ("tpo_placements", "tpo", "tpo_placements", {}),
+    ("tpo_placements last page", "tpo", "tpo_placements", {"sort": "package_desc", "cursor": KeysetPage.LAST}),
+    ("tpo_placements q=acme", "tpo", "tpo_placements", {"q": "acme", "status": "Accepted"}),
+    ("export_students_csv", "tpo", "export_students_csv", {}),
+    ("export_placements_csv", "tpo", "export_placements_csv", {}),
+    ("mentor_dashboard", "mentor", "mentor_dashboard", {}),
+    ("mentor_dashboard q+sort", "mentor", "mentor_dashboard", {"q": "sha", "sort": "package_desc"}),
+    ("mentor_export_csv", "mentor", "mentor_export_csv", {}),
+    ("std_dashboard", "student", "std_dashboard", {}),
+    ("api_tpo_stats", "tpo", "api_tpo_stats", {}),
+    ("api_tpo_placements", "tpo", "api_tpo_placements", {"sort": "package_desc", "limit": 100}),
+    ("api_mentor_roster", "mentor", "api_mentor_roster", {"sort": "cgpa_desc"}),
+]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def measure(func, repeat=3, setup=None):
+    """
+    Run `func` `repeat` times (after one warm-up run) and once more under
+    tracemalloc, calling `setup` (untimed) before each run.
+    """
+    setup = setup or (lambda: None)
+    setup()
+    func()
+    times = []
+    for _ in range(repeat):
+        setup()
+        log = QueryLog()
+        start = time.perf_counter()
+        with log.recording():
+            func()
+        times.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "ms": round(statistics.median(times) * 1000, 1),
+        "queries": log.count,
+        "db_ms": round(log.duration * 1000, 1),
+        "peak_kib": peak // 1024,
+    }
+
+
+def _actors():
+    tpo = User.objects.get(username=TPO_USERNAME)
+    mentor = Mentor.objects.annotate(n=Count("students")).order_by("-n", "id").select_related("user").first()
+    student = (
+        Student.objects.filter(mentor=mentor).select_related("user")
+        .order_by("-top_package_lpa", "id").first()
+    )
+    if mentor is None or student is None:
+        raise ValueError("No synthetic college found; run manage.py generate_college first.")
+    return {"tpo": tpo, "mentor": mentor.user, "student": student.user}, student
+
+
+def _view_runner(client, url, params):
+    def run():
+        response = client.get(url, params)
+        if response.status_code != 200:
+            raise ValueError(f"GET {url} answered {response.status_code}")
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    return run
+
+
+def run_benchmarks(repeat=3, only=None, progress=None):
+    """
+    Benchmark every target (or those whose name starts with one of `only`)
+    on the current database; returns a list of result dicts.
+    """
+    users, student = _actors()
+    clients = {}
+    for role, user in users.items():
+        clients[role] = Client()
+        clients[role].force_login(user)
+
+    targets = []
+    for name, role, url_name, params in VIEW_TARGETS:
+        url = reverse(url_name, args=[student.pk] if url_name == "std_dashboard" else [])
+        targets.append((name, _view_runner(clients[role], url, params)))
+    targets += [
+        ("build_tpo_context", lambda: build_tpo_context(TPO_PROMPT)),
+        ("build_student_context",
+         lambda: build_student_context(Student.objects.select_related("mentor").get(pk=student.pk))),
+    ]
+
+    results = []
+    # the middleware would log every request; QueryLog measures them here
+    with override_settings(QUERY_INSTRUMENTATION=False):
+        for name, func in targets:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            # dashboards are cached until the data changes: time a full render
+            result = {"name": name, **measure(func, repeat, setup=bump_all_versions)}
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def benchmark_report(repeat=3, only=None, progress=None):
+    """run_benchmarks() plus what is needed to compare runs: commit, database and data size."""
+    return {
+        "commit": git_commit(),
+        "database": connection.vendor,
+        "students": Student.objects.count(),
+        "placements": Placement.objects.count(),
+        "results": run_benchmarks(repeat, only, progress),
+    }
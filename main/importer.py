@@ -0,0 +1,417 @@
+"""
+Bulk import of students, semester GPAs and placements from CSV or XLSX.
+
+Rows are read as a stream, validated and written in batches; each batch
+is one transaction made of a handful of set-based statements (bulk
+upserts plus lookups), so a start-of-term load takes seconds. Used by the
+``import_data`` management command and the TPO upload view.
+
+Columns (header names are case-insensitive):
+
+* students:   username*, branch*, name or first_name/last_name, email,
+              mentor_email, cgpa, attendance, credits, current_semester
+* semesters:  username*, semester_number*, gpa*
+* placements: username*, company*, position*, package*, package_unit
+              (LPA/K), status (Pending/Accepted/Rejected)
+
+Students are keyed by username, semesters by (student, semester_number)
+and placements by (student, company, position). Placement has no unique
+key to upsert on, so placements are matched on those three columns and
+written with one bulk_create plus one bulk_update per batch.
+
+CGPA normally follows the semester GPAs (main.models.recompute_cgpa). A
+students file with a ``cgpa`` column sets it as given, e.g. as the opening
+value of students whose semesters are not imported; the next semesters
+import or grade-sheet save for them recomputes it. Without that column, a
+``current_semester`` change recomputes it from the semesters.
+"""
+import codecs
+import csv
+import io
+import math
+import os
+import zipfile
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import (
+    Mentor, Placement, Profile, Semester, Student,
+    bulk_upsert, provision_semesters, recompute_cgpa, refresh_placement_summaries,
+)
+from .search import index_placements, index_students
+from .stats import reconcile_stats
+from .versioning import bump_all_versions
+
+KINDS = ("students", "semesters", "placements")
+DEFAULT_BATCH_SIZE = 1000
+
+
+class ImportFileError(Exception):
+    """The file cannot be read at all (bad format, missing columns...)."""
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    rows: int = 0
+    imported: int = 0
+    errors: list = field(default_factory=list)  # (line number, message)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _normalize_header(name):
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def _check_utf8(fileobj, chunk_size=64 * 1024):
+    """Decode a seekable binary file once, so a bad file fails before any batch is written."""
+    start = fileobj.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        decoder.decode(chunk)
+    decoder.decode(b"", final=True)
+    fileobj.seek(start)
+
+
+def _read_csv(fileobj):
+    try:
+        if isinstance(fileobj.read(0), bytes):
+            if fileobj.seekable():
+                _check_utf8(fileobj)
+            fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        reader = csv.reader(fileobj)
+        header = next(reader, None)
+    except (UnicodeDecodeError, csv.Error):
+        raise ImportFileError("File must be UTF-8 encoded CSV")
+    if header is None:
+        return [], iter(())
+
+    def rows():
+        try:
+            yield from reader
+        except (UnicodeDecodeError, csv.Error):
+            raise ImportFileError("File must be UTF-8 encoded CSV")
+
+    return [_normalize_header(h) for h in header], rows()
+
+
+def _read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ImportFileError("Reading .xlsx files requires openpyxl (pip install openpyxl).")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, ValueError, OSError):
+        raise ImportFileError("File is not a readable .xlsx workbook")
+    if header is None:
+        return [], iter(())
+    return [_normalize_header(h) for h in header], rows
+
+
+def read_rows(fileobj, filename):
+    """Return (header, iterator of (line number, row dict)) without loading the whole file."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        header, rows = _read_xlsx(fileobj)
+    elif ext in (".csv", ".txt", ""):
+        header, rows = _read_csv(fileobj)
+    else:
+        raise ImportFileError(f"Unsupported file type '{ext}'; upload a .csv or .xlsx file.")
+
+    def generate():
+        for line, values in enumerate(rows, start=2):
+            values = ["" if v is None else str(v).strip() for v in values]
+            if not any(values):
+                continue
+            yield line, dict(zip(header, values))
+
+    return header, generate()
+
+
+# -------------------------
+# Validation
+# -------------------------
+REQUIRED_COLUMNS = {
+    "students": {"username", "branch"},
+    "semesters": {"username", "semester_number", "gpa"},
+    "placements": {"username", "company", "position", "package"},
+}
+
+
+def _number(row, column, cast=float, low=None, high=None, default=None):
+    raw = row.get(column, "")
+    if raw == "":
+        if default is None:
+            raise ValueError(f"'{column}' is required")
+        return default
+    try:
+        value = cast(float(raw)) if cast is int else cast(raw)
+    except (ValueError, OverflowError):
+        raise ValueError(f"'{column}' must be a number, got '{raw}'")
+    if not math.isfinite(value):  # nan would pass the range check
+        raise ValueError(f"'{column}' must be a number, got '{raw}'")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise ValueError(f"'{column}' must be between {low} and {high}, got {raw}")
+    return value
+
+
+def _text(row, column, max_length, required=True):
+    value = row.get(column, "")
+    if required and not value:
+        raise ValueError(f"'{column}' is required")
+    if len(value) > max_length:
+        raise ValueError(f"'{column}' is longer than {max_length} characters")
+    return value
+
+
+def _clean_student(row):
+    name = row.get("name") or " ".join(filter(None, [row.get("first_name"), row.get("last_name")]))
+    if not name:
+        raise ValueError("'name' (or first_name/last_name) is required")
+    return {
+        "username": _text(row, "username", 150),
+        "name": name[:100],
+        "first_name": row.get("first_name") or name.split()[0],
+        "last_name": row.get("last_name") or " ".join(name.split()[1:]),
+        "email": _text(row, "email", 254, required=False),
+        "branch": _text(row, "branch", 50),
+        "mentor_email": row.get("mentor_email", ""),
+        "cgpa": _number(row, "cgpa", float, 0, 10, default=0.0),
+        "attendance": _number(row, "attendance", int, 0, 100, default=0),
+        "credits": _number(row, "credits", int, 0, default=0),
+        "current_semester": _number(row, "current_semester", int, 1, 8, default=1),
+    }
+
+
+def _clean_semester(row):
+    return {
+        "username": _text(row, "username", 150),
+        "semester_number": _number(row, "semester_number", int, 1, 8),
+        "gpa": _number(row, "gpa", float, 0, 10),
+    }
+
+
+PLACEMENT_STATUSES = {value.lower(): value for value, _ in Placement.STATUS_CHOICES}
+PACKAGE_UNITS = {value.lower(): value for value, _ in Placement.UNIT_CHOICES}
+
+
+def _clean_placement(row):
+    status = PLACEMENT_STATUSES.get((row.get("status") or "pending").lower())
+    if status is None:
+        raise ValueError(f"'status' must be one of {', '.join(PLACEMENT_STATUSES.values())}")
+    unit = PACKAGE_UNITS.get((row.get("package_unit") or "lpa").lower())
+    if unit is None:
+        raise ValueError(f"'package_unit' must be one of {', '.join(PACKAGE_UNITS.values())}")
+    return {
+        "username": _text(row, "username", 150),
+        "company": _text(row, "company", 100),
+        "position": _text(row, "position", 100),
+        "package": _number(row, "package", float, 0),
+        "package_unit": unit,
+        "status": status,
+    }
+
+
+CLEANERS = {
+    "students": _clean_student,
+    "semesters": _clean_semester,
+    "placements": _clean_placement,
+}
+
+
+# -------------------------
+# Writing (one transaction per batch; each writer returns the branches it touched)
+# -------------------------
+def _student_ids(usernames):
+    return dict(Student.objects.filter(user__username__in=usernames).values_list("user__username", "id"))
+
+
+def _write_students(batch, header, report):
+    mentor_emails = {r["mentor_email"] for _, r in batch if r["mentor_email"]}
+    mentors = dict(Mentor.objects.filter(email__in=mentor_emails).values_list("email", "id"))
+
+    # an existing account may only be updated if it is a student's
+    account_types = dict(
+        User.objects.filter(username__in={r["username"] for _, r in batch}).values_list("username", "profile__user_type")
+    )
+
+    rows = {}
+    for line, r in batch:
+        if r["mentor_email"] and r["mentor_email"] not in mentors:
+            report.errors.append((line, f"unknown mentor_email '{r['mentor_email']}'"))
+            continue
+        if account_types.get(r["username"], "student") != "student":
+            report.errors.append((line, f"username '{r['username']}' belongs to an account that is not a student"))
+            continue
+        rows[r["username"]] = r  # last row wins for a repeated username
+
+    if not rows:
+        return set()
+    old_branches = set(Student.objects.filter(user__username__in=rows).values_list("branch", flat=True))
+
+    # Accounts get an unusable password; existing passwords are kept, and
+    # so is an email the file has no column for
+    bulk_upsert(
+        User,
+        [User(username=u, first_name=r["first_name"][:150], last_name=r["last_name"][:150],
+              email=r["email"], password=make_password(None)) for u, r in rows.items()],
+        unique_fields=["username"],
+        update_fields=["first_name", "last_name"] + (["email"] if "email" in header else []),
+    )
+    user_ids = dict(User.objects.filter(username__in=rows).values_list("username", "id"))
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_ids[u], user_type="student") for u in rows], ignore_conflicts=True
+    )
+
+    # Only overwrite the optional columns the file actually has
+    update_fields = ["name", "branch"] + [
+        f for f in ("email", "cgpa", "attendance", "credits", "current_semester") if f in header
+    ]
+    if "mentor_email" in header:
+        update_fields.append("mentor")
+    bulk_upsert(
+        Student,
+        [Student(user_id=user_ids[u], name=r["name"], email=r["email"], branch=r["branch"],
+                 mentor_id=mentors.get(r["mentor_email"]), cgpa=r["cgpa"], attendance=r["attendance"],
+                 credits=r["credits"], current_semester=r["current_semester"]) for u, r in rows.items()],
+        unique_fields=["user"],
+        update_fields=update_fields,
+    )
+    # bulk_create skips the post_save signals that create semesters and search tokens
+    student_ids = list(Student.objects.filter(user_id__in=user_ids.values()).values_list("id", flat=True))
+    provision_semesters(student_ids)
+    if "current_semester" in header and "cgpa" not in header:
+        recompute_cgpa(student_ids)  # the completed semesters may have changed
+    index_students(student_ids)
+    report.imported += len(rows)
+    return old_branches | {r["branch"] for r in rows.values()}
+
+
+def _branches(student_ids):
+    return set(Student.objects.filter(pk__in=student_ids).values_list("branch", flat=True))
+
+
+def _resolve_students(batch, report):
+    student_ids = _student_ids({r["username"] for _, r in batch})
+    resolved = []
+    for line, r in batch:
+        if r["username"] not in student_ids:
+            report.errors.append((line, f"unknown student username '{r['username']}'"))
+        else:
+            resolved.append((student_ids[r["username"]], r))
+    return resolved
+
+
+def _write_semesters(batch, header, report):
+    rows = {(sid, r["semester_number"]): r["gpa"] for sid, r in _resolve_students(batch, report)}
+    if not rows:
+        return set()
+    bulk_upsert(
+        Semester,
+        [Semester(student_id=sid, semester_number=num, gpa=gpa) for (sid, num), gpa in rows.items()],
+        unique_fields=["student", "semester_number"],
+        update_fields=["gpa"],
+    )
+    student_ids = {sid for sid, _ in rows}
+    recompute_cgpa(student_ids)
+    report.imported += len(rows)
+    return _branches(student_ids)
+
+
+def _write_placements(batch, header, report):
+    rows = {(sid, r["company"], r["position"]): r for sid, r in _resolve_students(batch, report)}
+    if not rows:
+        return set()
+
+    # Placement has no unique key, so match on (student, company, position)
+    student_ids = {sid for sid, _, _ in rows}
+    existing = {
+        (sid, company, position): pk
+        for pk, sid, company, position in Placement.objects.filter(
+            student_id__in=student_ids, company__in={c for _, c, _ in rows}
+        ).values_list("id", "student_id", "company", "position")
+    }
+
+    to_create, to_update = [], []
+    for key, r in rows.items():
+        placement = Placement(
+            id=existing.get(key), student_id=key[0], company=r["company"], position=r["position"],
+            package=r["package"], package_unit=r["package_unit"], status=r["status"],
+            package_lpa=Placement.normalize_package(r["package"], r["package_unit"]),
+        )
+        (to_update if placement.id else to_create).append(placement)
+
+    Placement.objects.bulk_create(to_create)
+    Placement.objects.bulk_update(to_update, ["package", "package_unit", "package_lpa", "status"])
+    refresh_placement_summaries(student_ids)
+    index_placements(Placement.objects.filter(student_id__in=student_ids).values_list("id", flat=True))
+    report.imported += len(rows)
+    return _branches(student_ids)
+
+
+WRITERS = {
+    "students": _write_students,
+    "semesters": _write_semesters,
+    "placements": _write_placements,
+}
+
+
+def import_file(kind, fileobj, filename, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Import `fileobj` as `kind` ("students", "semesters" or "placements").
+
+    Invalid rows are skipped and reported; valid rows are upserted in
+    batches of `batch_size`, each in its own transaction. `progress`, if
+    given, is called with the report after every batch.
+    """
+    if kind not in KINDS:
+        raise ImportFileError(f"Unknown import kind '{kind}'; expected one of {', '.join(KINDS)}.")
+
+    header, rows = read_rows(fileobj, filename)
+    missing = REQUIRED_COLUMNS[kind] - set(header)
+    if missing:
+        raise ImportFileError(f"Missing required column(s): {', '.join(sorted(missing))}")
+
+    clean, write = CLEANERS[kind], WRITERS[kind]
+    report = ImportReport(kind=kind)
+
+    def flush(batch):
+        with transaction.atomic():
+            branches = write(batch, header, report)
+            # bulk writes skip post_save: recompute the touched branches'
+            # dashboard stats and invalidate cached data explicitly
+            if branches:
+                reconcile_stats(branches)
+            transaction.on_commit(bump_all_versions)
+        if progress:
+            progress(report)
+
+    batch = []
+    for line, row in rows:
+        report.rows += 1
+        try:
+            batch.append((line, clean(row)))
+        except ValueError as exc:
+            report.errors.append((line, str(exc)))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    report.errors.sort()
+    return report
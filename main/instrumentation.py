@@ -0,0 +1,148 @@
+"""
+Per-request SQL instrumentation.
+
+QueryInstrumentationMiddleware wraps every database call made while a
+request is handled and records the query count, the time spent in the
+database and how often each query *shape* (its SQL with literals and IN
+lists collapsed) ran. A shape that repeats ``QUERY_REPEAT_THRESHOLD`` times
+in one request is almost always a per-row lookup in a loop (N+1) and is
+logged as a warning.
+
+Every response gets a ``Server-Timing`` header (visible in the browser's
+network panel) and one summary line per request is logged to
+``main.instrumentation`` with the view name, so dashboards and exports can
+be compared release to release. Streaming responses (CSV exports) are
+measured until their last chunk is sent; their header only covers the work
+done before streaming started. Async views run without a thread hop
+(the middleware is async-capable); their async streams are reported when
+the response is returned.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """`sql` with literals, placeholder lists and whitespace normalised."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql.replace("%s", "?"))
+    return _SPACE.sub(" ", sql).strip()
+
+
+class QueryLog:
+    """execute_wrapper that counts and times the queries run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    def recording(self):
+        """Install this log on every database connection of this thread; returns an ExitStack removing it."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def repeated(self, threshold):
+        """[(shape, times)] of the shapes that ran at least `threshold` times."""
+        return [(shape, times) for shape, times in self.shapes.most_common() if times >= threshold]
+
+
+class QueryInstrumentationMiddleware:
+    # Async-capable, so under ASGI the async AI views are not pushed onto a
+    # thread that blocks for the whole model call.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_INSTRUMENTATION", True)
+        self.threshold = getattr(settings, "QUERY_REPEAT_THRESHOLD", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        log = QueryLog()
+        start = time.perf_counter()
+        with log.recording():
+            response = self.get_response(request)
+        return self.finish(request, response, log, start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # Connections are per thread and async views reach the database
+        # through sync_to_async(), which runs every call of this request on
+        # one thread: install the wrappers on that thread's connections.
+        log = QueryLog()
+        start = time.perf_counter()
+        recording = await sync_to_async(log.recording)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        return self.finish(request, response, log, start)
+
+    def finish(self, request, response, log, start):
+        elapsed = time.perf_counter() - start
+        response["Server-Timing"] = (
+            f'db;dur={log.duration * 1000:.1f};desc="{log.count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._measure_stream(request, response, response.streaming_content, log, start)
+        else:
+            self.report(request, response, log, elapsed)
+        return response
+
+    def _measure_stream(self, request, response, content, log, start):
+        with log.recording():
+            yield from content
+        self.report(request, response, log, time.perf_counter() - start)
+
+    def report(self, request, response, log, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        repeated = log.repeated(self.threshold)
+        logger.info(
+            "request view=%s method=%s status=%s queries=%d db_ms=%.1f total_ms=%.1f repeated=%d",
+            view, request.method, response.status_code,
+            log.count, log.duration * 1000, elapsed * 1000, len(repeated),
+            extra={
+                "view": view,
+                "queries": log.count,
+                "db_ms": round(log.duration * 1000, 1),
+                "total_ms": round(elapsed * 1000, 1),
+            },
+        )
+        for shape, times in repeated:
+            logger.warning("Possible N+1 in %s: %d x %s", view, times, shape[:300])
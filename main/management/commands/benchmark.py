@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from main.benchmark import benchmark_report
+from main.models import Student
+from main.synthetic import generate_college
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboards, exports and AI context builders and record their query counts and peak memory. "
+        "With --sizes, each size is generated into a throwaway test database first; "
+        "otherwise the current database (see generate_college) is measured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", help="Comma-separated student counts, e.g. 1000,10000,100000")
+        parser.add_argument("--placements-per-student", type=int, default=1, help="Used with --sizes (default %(default)s)")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per target; the median is kept (default %(default)s)")
+        parser.add_argument("--only", action="append", help="Only targets whose name starts with this (repeatable)")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--compare", help="JSON file from an earlier run to compare with")
+
+    def handle(self, sizes, placements_per_student, repeat, only, output, compare, **options):
+        baseline = {}
+        if compare:
+            try:
+                with open(compare) as fileobj:
+                    baseline = {
+                        (report["students"], result["name"]): result
+                        for report in json.load(fileobj) for result in report["results"]
+                    }
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {compare}: {exc}")
+
+        try:
+            sizes = [int(size) for size in sizes.split(",")] if sizes else [None]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        setup_test_environment()
+        try:
+            reports = [self.run(size, placements_per_student, repeat, only, baseline) for size in sizes]
+        finally:
+            teardown_test_environment()
+
+        if output:
+            with open(output, "w") as fileobj:
+                json.dump(reports, fileobj, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {output}."))
+
+    def run(self, size, placements_per_student, repeat, only, baseline):
+        if size is None:
+            return self.measure(repeat, only, baseline)
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Generating {size} students...")
+            try:
+                generate_college(size, mentors=max(size // 40, 1), placements_per_student=placements_per_student)
+            except ValueError as exc:
+                raise CommandError(exc)
+            return self.measure(repeat, only, baseline)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def measure(self, repeat, only, baseline):
+        students = Student.objects.count()
+        self.stdout.write(f"{students} students:")
+
+        def progress(result):
+            line = f"  {result['name']:32} {result['ms']:9.1f} ms {result['queries']:5} queries {result['peak_kib']:8} KiB"
+            before = baseline.get((students, result["name"]))
+            if before:
+                change = (result["ms"] - before["ms"]) / before["ms"] * 100 if before["ms"] else 0
+                line += f"   {change:+6.1f}% time, {result['queries'] - before['queries']:+d} queries"
+            self.stdout.write(line)
+
+        try:
+            return benchmark_report(repeat, only, progress)
+        except ValueError as exc:
+            raise CommandError(exc)
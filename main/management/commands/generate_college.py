@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.synthetic import generate_college
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic college (students, mentors, semesters, placements) for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000, help="Students to create (default %(default)s)")
+        parser.add_argument("--mentors", type=int, default=50, help="Mentors to create (default %(default)s)")
+        parser.add_argument("--branches", type=int, default=6, help="Number of branches (default %(default)s)")
+        parser.add_argument(
+            "--placements-per-student", type=int, default=1,
+            help="Average placements per student, 0 to twice this (default %(default)s)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; same seed, same data (default %(default)s)")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Students written per transaction (default %(default)s)")
+
+    def handle(self, students, mentors, branches, placements_per_student, seed, batch_size, **options):
+        def progress(written):
+            self.stdout.write(f"  {written}/{students} students")
+
+        try:
+            generate_college(students, mentors, branches, placements_per_student, seed, batch_size, progress)
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f"Generated {students} students, {mentors} mentors in {branches} branches."))
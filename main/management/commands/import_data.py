@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import importer
+
+
+class Command(BaseCommand):
+    help = "Bulk import students, semester GPAs or placements from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=importer.KINDS)
+        parser.add_argument("path", help="Path to a .csv or .xlsx file")
+        parser.add_argument(
+            "--batch-size", type=int, default=importer.DEFAULT_BATCH_SIZE,
+            help="Rows written per transaction (default %(default)s)",
+        )
+        parser.add_argument("--max-errors", type=int, default=50, help="Rejected rows to print (default %(default)s)")
+
+    def handle(self, kind, path, batch_size, max_errors, **options):
+        def progress(report):
+            self.stdout.write(f"  {report.rows} rows read, {report.imported} imported, {report.failed} rejected")
+
+        try:
+            with open(path, "rb") as fileobj:
+                report = importer.import_file(kind, fileobj, path, batch_size=batch_size, progress=progress)
+        except (OSError, importer.ImportFileError) as exc:
+            raise CommandError(exc)
+
+        for line, error in report.errors[:max_errors]:
+            self.stderr.write(f"line {line}: {error}")
+        if report.failed > max_errors:
+            self.stderr.write(f"... {report.failed - max_errors} more rejected rows")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.imported} {kind} row(s) from {path} ({report.rows} read, {report.failed} rejected)."
+        ))
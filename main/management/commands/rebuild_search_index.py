@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Placement, SearchToken, Student
+from main.search import index_placements, index_students
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search tokens of every student and placement."
+
+    def handle(self, **options):
+        index_students(Student.objects.values_list("id", flat=True))
+        index_placements(Placement.objects.values_list("id", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {SearchToken.objects.count()} tokens."))
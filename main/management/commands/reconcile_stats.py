@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from main.models import BranchStats
+from main.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard statistics from the Student and Placement tables (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", action="append", dest="branches", help="Only this branch (repeatable)")
+
+    def handle(self, branches, **options):
+        reconcile_stats(branches)
+        count = BranchStats.objects.filter(branch__in=branches).count() if branches else BranchStats.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled dashboard stats for {count} branch(es)."))
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _package_in_lpa(package, unit):
+    if unit == 'K':
+        return (package or 0) / 100
+    return package or 0
+
+
+def backfill_placement_summary(apps, schema_editor):
+    Student = apps.get_model('main', 'Student')
+    Placement = apps.get_model('main', 'Placement')
+
+    by_student = {}
+    for p in Placement.objects.values('id', 'student_id', 'status', 'package', 'package_unit').iterator():
+        by_student.setdefault(p['student_id'], []).append(p)
+
+    batch = []
+    for student in Student.objects.only('id').iterator():
+        placements = by_student.get(student.id, [])
+        accepted = [p for p in placements if p['status'] == 'Accepted']
+        candidates = accepted or placements
+        top = max(candidates, key=lambda p: _package_in_lpa(p['package'], p['package_unit'])) if candidates else None
+
+        student.placement_status = 'Placed' if accepted else 'In Progress' if placements else 'Not Placed'
+        student.accepted_count = len(accepted)
+        student.pending_count = sum(1 for p in placements if p['status'] == 'Pending')
+        student.top_placement_id = top['id'] if top else None
+        student.top_package_lpa = _package_in_lpa(top['package'], top['package_unit']) if top else 0.0
+        batch.append(student)
+
+        if len(batch) >= 500:
+            Student.objects.bulk_update(batch, SUMMARY_FIELDS)
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, SUMMARY_FIELDS)
+
+
+SUMMARY_FIELDS = ['placement_status', 'accepted_count', 'pending_count', 'top_placement', 'top_package_lpa']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_student_current_semester'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='placement_status',
+            field=models.CharField(choices=[('Placed', 'Placed'), ('In Progress', 'In Progress'), ('Not Placed', 'Not Placed')], db_index=True, default='Not Placed', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='top_package_lpa',
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='top_placement',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.placement'),
+        ),
+        migrations.RunPython(backfill_placement_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_package_lpa(apps, schema_editor):
+    Placement = apps.get_model('main', 'Placement')
+    Placement.objects.filter(package_unit='K').update(package_lpa=F('package') / 100.0)
+    Placement.objects.exclude(package_unit='K').update(package_lpa=F('package'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_student_placement_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placement',
+            name='package_lpa',
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+        migrations.RunPython(backfill_package_lpa, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_placement_package_lpa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='placement',
+            index=models.Index(fields=['created_at', 'id'], name='placement_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='placement',
+            index=models.Index(fields=['package_lpa', 'id'], name='placement_package_id_idx'),
+        ),
+    ]
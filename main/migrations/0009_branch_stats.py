@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_placement_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch', models.CharField(max_length=50, unique=True)),
+                ('students', models.IntegerField(default=0)),
+                ('placed', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('with_pending', models.IntegerField(default=0)),
+                ('cgpa_total', models.FloatField(default=0.0)),
+                ('placements', models.IntegerField(default=0)),
+                ('packages_below_3', models.IntegerField(default=0)),
+                ('packages_3_to_6', models.IntegerField(default=0)),
+                ('packages_6_to_10', models.IntegerField(default=0)),
+                ('packages_10_plus', models.IntegerField(default=0)),
+                ('highest_package', models.FloatField(default=0.0)),
+            ],
+            options={
+                'verbose_name_plural': 'branch stats',
+            },
+        ),
+    ]
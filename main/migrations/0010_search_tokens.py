@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:02
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _tokenize(*texts):
+    words = set()
+    for text in texts:
+        words.update(word[:40] for word in re.findall(r"[^\W_]+", (text or "").lower()))
+    return words
+
+
+def build_search_tokens(apps, schema_editor):
+    Student = apps.get_model('main', 'Student')
+    Placement = apps.get_model('main', 'Placement')
+    SearchToken = apps.get_model('main', 'SearchToken')
+
+    batch = []
+    for sid, *texts in Student.objects.values_list(
+        'id', 'name', 'email', 'user__first_name', 'user__last_name'
+    ).iterator():
+        batch.extend(SearchToken(student_id=sid, token=token) for token in _tokenize(*texts))
+        if len(batch) >= 2000:
+            SearchToken.objects.bulk_create(batch)
+            batch = []
+
+    for pid, sid, company, position in Placement.objects.values_list(
+        'id', 'student_id', 'company', 'position'
+    ).iterator():
+        batch.extend(SearchToken(placement_id=pid, student_id=sid, token=token) for token in _tokenize(company, position))
+        if len(batch) >= 2000:
+            SearchToken.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_branch_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=40)),
+                ('placement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.placement')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'student'], name='searchtoken_student_idx'), models.Index(fields=['token', 'placement'], name='searchtoken_placement_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_tokens, migrations.RunPython.noop),
+    ]
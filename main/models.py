@@ -1,9 +1,17 @@
-from django.db import models
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg
+from django.db.models import Avg, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
+from .versioning import bump_all_versions, bump_versions
 
 
 class Profile(models.Model):
@@ -66,7 +74,61 @@ class Mentor(models.Model):
 #     def __str__(self):
 #         return self.name
 
+# Student fields whose changes move the dashboard counters
+STATS_FIELDS = ('branch', 'cgpa', 'placement_status', 'pending_count')
+
+
+def best_placement(placements):
+    """The placement with the highest package in LPA (earliest on ties), or None."""
+    return max(placements, key=lambda p: (p.package_lpa, -(p.pk or 0)), default=None)
+
+
+# Placement columns annotate_top_offer() loads (as live_top_offer_<field>)
+LIVE_TOP_OFFER_FIELDS = ('id', 'company', 'position', 'package', 'package_unit', 'status', 'package_lpa')
+
+
+def top_offer_subquery(field='id'):
+    """
+    Subquery for `field` of the student's best accepted placement (by
+    package in LPA, earliest on ties), computed live from Placement.
+    """
+    return Subquery(
+        Placement.objects.filter(student=OuterRef('pk'), status='Accepted')
+        .order_by('-package_lpa', 'id').values(field)[:1]
+    )
+
+
+class StudentQuerySet(models.QuerySet):
+    def with_top_offer(self):
+        """Load each student's top offer with the row (from the placement summary)."""
+        return self.select_related('top_placement')
+
+    def annotate_top_offer(self):
+        """
+        Load each student's top offer straight from the placements instead
+        of the summary (one subquery per column), for when the summary may
+        be stale, e.g. to check it.
+        """
+        return self.annotate(**{f'live_top_offer_{field}': top_offer_subquery(field) for field in LIVE_TOP_OFFER_FIELDS})
+
+
 class Student(models.Model):
+    PLACED = 'Placed'
+    IN_PROGRESS = 'In Progress'
+    NOT_PLACED = 'Not Placed'
+    PLACEMENT_STATUS_CHOICES = [
+        (PLACED, 'Placed'),
+        (IN_PROGRESS, 'In Progress'),
+        (NOT_PLACED, 'Not Placed'),
+    ]
+
+    # ?status= values used by the dashboards and exports
+    STATUS_FILTERS = {
+        'placed': PLACED,
+        'in-progress': IN_PROGRESS,
+        'not-placed': NOT_PLACED,
+    }
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='student_profile')
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -80,18 +142,101 @@ class Student(models.Model):
     # NEW FIELD
     current_semester = models.PositiveIntegerField(default=1)
 
+    # Placement summary, maintained from Placement writes (see
+    # refresh_placement_summary). Never edit these by hand.
+    placement_status = models.CharField(max_length=20, choices=PLACEMENT_STATUS_CHOICES, default=NOT_PLACED, db_index=True, editable=False)
+    accepted_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_count = models.PositiveIntegerField(default=0, editable=False)
+    # best accepted offer, or best offer of any status while none is accepted
+    top_placement = models.ForeignKey('Placement', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', editable=False)
+    top_package_lpa = models.FloatField(default=0.0, db_index=True, editable=False)
+
+    objects = StudentQuerySet.as_manager()
+
     @property
     def package_lpa(self):
         return float(self.package) / 100000  # convert INR to LPA
 
     @property
     def top_offer(self):
-        # Get only accepted offers
-        offers = self.placements.filter(status="Accepted")
-        if not offers.exists():
+        """
+        Highest accepted offer (by package in LPA). Computed from prefetched
+        placements when there are any, else built from the annotate_top_offer()
+        columns, else read from the summary (no query with
+        Student.objects.with_top_offer()).
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('placements')
+        if prefetched is not None:
+            return best_placement([p for p in prefetched if p.status == 'Accepted'])
+        if 'live_top_offer_id' in self.__dict__:
+            if self.live_top_offer_id is None:
+                return None
+            values = {'student_id': self.pk}
+            values.update((field, getattr(self, f'live_top_offer_{field}')) for field in LIVE_TOP_OFFER_FIELDS)
+            fields = [f.attname for f in Placement._meta.concrete_fields if f.attname in values]
+            return Placement.from_db(self._state.db, fields, [values[f] for f in fields])
+        if self.placement_status != self.PLACED:
             return None
-        # max based on numeric package
-        return max(offers, key=lambda o: float(o.package))
+        return self.top_placement
+
+    @property
+    def has_any_placement(self):
+        return self.placement_status != self.NOT_PLACED
+
+    @property
+    def has_accepted_placement(self):
+        return self.placement_status == self.PLACED
+
+    def ensure_semesters(self):
+        """
+        This student's semesters, creating missing rows first (needed when
+        SEMESTER_PROVISIONING is 'lazy').
+        """
+        semesters = list(self.semesters.all())
+        if len(semesters) < SEMESTER_COUNT:
+            provision_semesters([self.pk])
+            semesters = list(self.semesters.all())
+        return semesters
+
+    def save(self, *args, **kwargs):
+        # The summary columns are written only by the placement refresh
+        # (a queryset update), so a full save of an instance loaded before
+        # a placement write must not put its stale copy back.
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs['update_fields'] = [f for f in update_fields if f not in SUMMARY_FIELDS]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_state = instance.stats_state()
+        # the mentor whose cached dashboard must be invalidated if it changes
+        instance._loaded_mentor_id = instance.__dict__.get('mentor_id')
+        return instance
+
+    def stats_state(self):
+        """
+        The values that feed the dashboard counters (main.stats), or None
+        when some of them were not loaded.
+        """
+        if any(field not in self.__dict__ for field in STATS_FIELDS):
+            return None
+        return tuple(getattr(self, field) for field in STATS_FIELDS)
+
+    def refresh_placement_summary(self):
+        """Recompute the placement summary columns from this student's placements."""
+        from .stats import record_student_change  # stats imports this module
+
+        old_state = self.stats_state()
+        summary = summarize_placements(Placement.objects.filter(student_id=self.pk))
+        Student.objects.filter(pk=self.pk).update(**summary)
+        for field, value in summary.items():
+            setattr(self, field, value)
+        record_student_change(old_state, self.stats_state())
+        self._stats_state = self.stats_state()
 
 
     @property
@@ -102,11 +247,153 @@ class Student(models.Model):
         return self.name
 
 
+def summarize_placements(placements):
+    """Build the Student placement-summary columns from an iterable of placements."""
+    placements = list(placements)
+    accepted = [p for p in placements if p.status == 'Accepted']
+    pending_count = sum(1 for p in placements if p.status == 'Pending')
+
+    if accepted:
+        status = Student.PLACED
+    elif placements:
+        status = Student.IN_PROGRESS
+    else:
+        status = Student.NOT_PLACED
+
+    top = best_placement(accepted or placements)
+
+    return {
+        'placement_status': status,
+        'accepted_count': len(accepted),
+        'pending_count': pending_count,
+        'top_placement': top,
+        'top_package_lpa': top.package_lpa if top else 0.0,
+    }
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=None):
+    """INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE for a list of unsaved objects."""
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None  # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    model.objects.bulk_create(
+        objs, batch_size=batch_size, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields
+    )
+
+
+SUMMARY_FIELDS = ['placement_status', 'accepted_count', 'pending_count', 'top_placement', 'top_package_lpa']
+
+
+def refresh_placement_summaries(student_ids, batch_size=500):
+    """Recompute the placement summary for many students (two queries per batch)."""
+    student_ids = list(student_ids)
+    for start in range(0, len(student_ids), batch_size):
+        ids = student_ids[start:start + batch_size]
+        by_student = defaultdict(list)
+        for p in Placement.objects.filter(student_id__in=ids).only('id', 'student_id', 'status', 'package_lpa'):
+            by_student[p.student_id].append(p)
+
+        students = []
+        for student_id in ids:
+            student = Student(pk=student_id)
+            for field, value in summarize_placements(by_student[student_id]).items():
+                setattr(student, field, value)
+            students.append(student)
+        Student.objects.bulk_update(students, SUMMARY_FIELDS)
+
+
+SEMESTER_COUNT = 8
+
+
+def provision_semesters(student_ids, batch_size=1000):
+    """Create any missing Semester 1-8 rows for the given students in one statement."""
+    Semester.objects.bulk_create(
+        [Semester(student_id=sid, semester_number=n, gpa=0.0)
+         for sid in student_ids for n in range(1, SEMESTER_COUNT + 1)],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+
+# Student ids whose semesters are waiting for the end of a batch_semester_provisioning() block
+_deferred_semesters = ContextVar('deferred_semesters', default=None)
+
+
+@contextmanager
+def batch_semester_provisioning():
+    """
+    Collect the students created inside the block and provision all their
+    semesters with one statement on exit, instead of one per student:
+
+        with batch_semester_provisioning():
+            for row in rows:
+                Student.objects.create(...)
+    """
+    if _deferred_semesters.get() is not None:  # already batching
+        yield
+        return
+    pending = []
+    token = _deferred_semesters.set(pending)
+    try:
+        yield
+        provision_semesters(pending)
+    finally:
+        _deferred_semesters.reset(token)
+
+
+# CGPA is the mean GPA of the completed semesters, i.e. those before
+# current_semester (0.0 when there are none). Every write path uses this.
+def completed_semesters(current_semester, **filters):
+    return Semester.objects.filter(semester_number__lt=current_semester, **filters)
+
+
+def recompute_cgpa(student_ids):
+    """Recompute CGPA for many students in a single UPDATE."""
+    completed = completed_semesters(
+        OuterRef('current_semester'), student=OuterRef('pk')
+    ).values('student').annotate(avg=Avg('gpa')).values('avg')
+    return Student.objects.filter(pk__in=student_ids).update(cgpa=Coalesce(Subquery(completed), Value(0.0)))
+
+
+def save_semester_gpas(student, gpas, current_semester=None):
+    """
+    Upsert {semester_number: gpa} for `student`, optionally move its
+    current_semester, and recompute CGPA, all in one transaction (three
+    queries). Returns the new CGPA.
+    """
+    from .stats import record_student_change  # stats imports this module
+
+    old_state = student.stats_state()
+    with transaction.atomic():
+        if gpas:
+            bulk_upsert(
+                Semester,
+                [Semester(student=student, semester_number=n, gpa=gpa) for n, gpa in gpas.items()],
+                unique_fields=['student', 'semester_number'],
+                update_fields=['gpa'],
+            )
+
+        if current_semester is not None:
+            student.current_semester = current_semester
+        student.cgpa = completed_semesters(student.current_semester, student=student).aggregate(
+            avg=Avg('gpa')
+        )['avg'] or 0.0
+        Student.objects.filter(pk=student.pk).update(current_semester=student.current_semester, cgpa=student.cgpa)
+        record_student_change(old_state, student.stats_state())
+
+        # bulk_create/update() skip post_save, so invalidate cached data explicitly
+        transaction.on_commit(partial(bump_versions, students=[student.pk], mentors=[student.mentor_id]))
+    return student.cgpa
+
+
 @receiver(post_save, sender=Student)
 def create_semesters(sender, instance, created, **kwargs):
-    if created:
-        for sem_num in range(1, 9):
-            Semester.objects.get_or_create(student=instance, semester_number=sem_num, defaults={'gpa': 0.0})
+    if not created or getattr(settings, 'SEMESTER_PROVISIONING', 'eager') == 'lazy':
+        return
+    pending = _deferred_semesters.get()
+    if pending is not None:
+        pending.append(instance.pk)
+    else:
+        provision_semesters([instance.pk])
 
 class Semester(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semesters')
@@ -139,15 +426,51 @@ class Placement(models.Model):
     package_unit = models.CharField(max_length=3, choices=UNIT_CHOICES, default='LPA')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    # package normalized to LPA; kept in sync by save() so sorting and
+    # aggregates can use the index
+    package_lpa = models.FloatField(default=0.0, db_index=True, editable=False)
+
+    class Meta:
+        # keyset pagination of the TPO placements list by date / package
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='placement_created_id_idx'),
+            models.Index(fields=['package_lpa', 'id'], name='placement_package_id_idx'),
+        ]
+
+    @staticmethod
+    def normalize_package(package, unit):
+        """Convert a raw package value in the given unit to LPA."""
+        package = float(package or 0)
+        if unit == 'K':
+            return package / 100  # convert thousands to LPA
+        return package
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # what this placement counted towards in the dashboard stats (main.stats)
+        instance._stats_state = (instance.__dict__.get('student_id'), instance.__dict__.get('package_lpa'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.package_lpa = self.normalize_package(self.package, self.package_unit)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('package' in update_fields or 'package_unit' in update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'package_lpa'}
+
+        # post_save refreshes the student's placement summary; keep both
+        # writes in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     @property
     def package_in_lpa(self):
         """Return package in LPA for comparison."""
-        if self.package_unit == 'LPA':
-            return self.package
-        elif self.package_unit == 'K':
-            return self.package / 100  # convert thousands to LPA
-        return self.package
+        return self.normalize_package(self.package, self.package_unit)
 
     # @property
     # def top_offer(self):
@@ -164,3 +487,108 @@ class Placement(models.Model):
 
     def __str__(self):
         return f"{self.student.name} - {self.company} ({self.status})"
+
+
+class SearchToken(models.Model):
+    """
+    One lower-cased word of a searchable field, for indexed prefix search
+    (main.search). Student tokens (name, email, account name) have no
+    placement; placement tokens (company, position) have both.
+    """
+    token = models.CharField(max_length=40)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    placement = models.ForeignKey(Placement, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'student'], name='searchtoken_student_idx'),
+            models.Index(fields=['token', 'placement'], name='searchtoken_placement_idx'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class BranchStats(models.Model):
+    """
+    Dashboard counters for one branch, kept up to date incrementally by
+    main.stats and periodically reconciled against the source tables.
+    """
+    branch = models.CharField(max_length=50, unique=True)
+    students = models.IntegerField(default=0)
+    placed = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    with_pending = models.IntegerField(default=0)  # students with a pending offer
+    cgpa_total = models.FloatField(default=0.0)
+    placements = models.IntegerField(default=0)
+    packages_below_3 = models.IntegerField(default=0)
+    packages_3_to_6 = models.IntegerField(default=0)
+    packages_6_to_10 = models.IntegerField(default=0)
+    packages_10_plus = models.IntegerField(default=0)
+    highest_package = models.FloatField(default=0.0)  # LPA, over all placements
+
+    class Meta:
+        verbose_name_plural = 'branch stats'
+
+    def __str__(self):
+        return f"{self.branch}: {self.placed}/{self.students} placed"
+
+
+def placement_student_ids(placement):
+    """
+    The student a placement belongs to, plus the one it was loaded (or last
+    saved) with when it has since moved to another student.
+    """
+    # main.stats resets _stats_state, but its receivers connect in ready(),
+    # after the ones below
+    loaded_student_id = getattr(placement, '_stats_state', (None, None))[0]
+    return {placement.student_id, loaded_student_id} - {None}
+
+
+@receiver(post_save, sender=Placement)
+@receiver(post_delete, sender=Placement)
+def sync_placement_summary(sender, instance, **kwargs):
+    # Lock the student rows so concurrent placement writes for the same
+    # student serialize and the summary always matches the committed rows.
+    with transaction.atomic():
+        students = Student.objects.select_for_update().filter(pk__in=placement_student_ids(instance)).order_by('pk')
+        for student in students:
+            student.refresh_placement_summary()
+
+
+def bump_student_versions(student_ids, mentor_ids=None):
+    """bump_versions() for these students and their mentors (looked up when not given)."""
+    if mentor_ids is None:
+        mentor_ids = Student.objects.filter(pk__in=student_ids).values_list('mentor_id', flat=True)
+    bump_versions(students=student_ids, mentors=mentor_ids)
+
+
+# Bump after commit so a reader that sees the new token also sees the new rows
+@receiver([post_save, post_delete], sender=Student)
+def bump_version_on_student_write(sender, instance, **kwargs):
+    mentors = {instance.mentor_id, getattr(instance, '_loaded_mentor_id', None)}
+    instance._loaded_mentor_id = instance.mentor_id
+    transaction.on_commit(partial(bump_student_versions, [instance.pk], mentors))
+
+
+@receiver([post_save, post_delete], sender=Semester)
+def bump_version_on_write(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_student_versions, [instance.student_id]))
+
+
+@receiver([post_save, post_delete], sender=Placement)
+def bump_version_on_placement_write(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_student_versions, placement_student_ids(instance)))
+
+
+@receiver([post_save, post_delete], sender=Mentor)
+def bump_version_on_mentor_write(sender, **kwargs):
+    # mentor names are shown on every dashboard
+    transaction.on_commit(bump_all_versions)
+
+
+@receiver(post_save, sender=User)
+def bump_version_on_account_write(sender, instance, created, update_fields=None, **kwargs):
+    # account names are shown on the dashboards; logins only save last_login
+    if not created and (update_fields is None or {'first_name', 'last_name'} & set(update_fields)):
+        transaction.on_commit(bump_all_versions)
@@ -0,0 +1,185 @@
+"""
+Keyset ("cursor") pagination.
+
+OFFSET pagination makes the database walk past every earlier row, so deep
+pages get slower the further you go. Keyset pagination remembers the sort
+key of the last row shown and asks for the rows after it, which an index on
+the sort columns answers in the same time for any page.
+
+An ordering is a list of field names as passed to ``order_by()`` and must
+end with a unique column (normally ``id``) so every row has a distinct key.
+"""
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .versioning import data_version
+
+
+def _fields(ordering):
+    return [f.lstrip("-") for f in ordering]
+
+
+def _reversed(ordering):
+    return [f[1:] if f.startswith("-") else f"-{f}" for f in ordering]
+
+
+def keyset_filter(ordering, values):
+    """Q matching the rows that come strictly after `values` in `ordering`."""
+    after, equal = Q(), Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        after |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return after
+
+
+def _key(row, ordering):
+    if isinstance(row, dict):
+        return [row[f] for f in _fields(ordering)]
+    return [getattr(row, f) for f in _fields(ordering)]
+
+
+def _json_default(value):
+    # full isoformat keeps microseconds, so the key compares exactly
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({"d": direction, "k": values}, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """(direction, key values) from a cursor token; None for a missing or malformed one."""
+    if not token:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        direction, values = data["d"], data["k"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+    if direction not in ("next", "prev") or not (values is None or isinstance(values, list)):
+        return None
+    if values and not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        return None
+    return direction, values
+
+
+class InvalidCursor(ValueError):
+    """A cursor that is malformed or does not fit the ordering it is used with."""
+
+
+class KeysetPage:
+    """One page of rows plus the cursors that lead to its neighbours."""
+
+    # cursor for the last page: walk backwards from the end
+    LAST = encode_cursor("prev", None)
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor("next", _key(self.object_list[-1], self.ordering))
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor("prev", _key(self.object_list[0], self.ordering))
+        return None
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=15):
+    """
+    Return the KeysetPage of `queryset` (sorted by `ordering`) that `cursor`
+    points to; no cursor means the first page. Costs one query at any depth.
+    Raises InvalidCursor for a cursor that was not made for this ordering
+    (edited by hand, or from another sort).
+    """
+    direction, values = "next", None
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise InvalidCursor("Malformed cursor.")
+        direction, values = position
+        if values is not None and len(values) != len(ordering):
+            raise InvalidCursor("Cursor does not match the ordering.")
+
+    backwards = direction == "prev"
+    walk = _reversed(ordering) if backwards else list(ordering)
+    queryset = queryset.order_by(*walk)
+    if values is not None:
+        try:
+            # values are converted to the fields' types here
+            queryset = queryset.filter(keyset_filter(walk, values))
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor("Cursor does not match the ordering.")
+
+    rows = list(queryset[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, ordering, has_next=values is not None, has_previous=more)
+    return KeysetPage(rows, ordering, has_next=more, has_previous=values is not None)
+
+
+def keyset_iterator(queryset, ordering, fields, chunk_size=2000):
+    """
+    Yield tuples of `fields` for every row of `queryset` in `ordering`,
+    fetching `chunk_size` rows per query. Unlike .iterator(), this never
+    holds a whole result set in the database driver (MySQL buffers it).
+    """
+    key_fields = _fields(ordering)
+    queryset = queryset.order_by(*ordering).values_list(*fields, *key_fields)
+    width = len(fields)
+    values = None
+    while True:
+        chunk = queryset.filter(keyset_filter(ordering, values)) if values is not None else queryset
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield row[:width]
+        if len(rows) < chunk_size:
+            return
+        values = list(rows[-1][width:])
+
+
+def cached_count(queryset, timeout=300):
+    """COUNT(*) of `queryset`, cached until the data version changes."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    key = "apts:count:" + hashlib.md5(f"{data_version()}:{sql}".encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose COUNT(*) comes from cached_count() (admin changelists)."""
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
@@ -0,0 +1,163 @@
+"""
+Indexed token search over students and placements.
+
+``icontains`` compiles to ``LIKE '%q%'``, which no index can serve, so every
+search scanned the placements joined to their students. Instead each
+searchable field is split into lower-cased words stored in SearchToken, and
+a query matches the rows that have, for every word typed, a token starting
+with it (``LIKE 'word%'`` on the indexed token column).
+
+Tokens are rebuilt when a Student, its User or a Placement is saved; bulk
+writers call index_students() / index_placements(), and
+``manage.py rebuild_search_index`` rebuilds everything.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Placement, SearchToken, Student
+
+TOKEN_LENGTH = SearchToken._meta.get_field("token").max_length
+MAX_QUERY_WORDS = 5
+
+STUDENT_FIELDS = {"name", "email"}
+USER_FIELDS = {"first_name", "last_name"}
+PLACEMENT_FIELDS = {"company", "position", "student"}
+
+
+def tokenize(*texts):
+    """The distinct lower-cased words (letters and digits) of `texts`."""
+    words = set()
+    for text in texts:
+        words.update(word[:TOKEN_LENGTH] for word in re.findall(r"[^\W_]+", (text or "").lower()))
+    return words
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+def _replace_student_tokens(rows):
+    """rows: (student id, *texts) tuples."""
+    rows = list(rows)
+    with transaction.atomic():
+        SearchToken.objects.filter(student_id__in=[r[0] for r in rows], placement__isnull=True).delete()
+        SearchToken.objects.bulk_create(
+            [SearchToken(student_id=sid, token=token) for sid, *texts in rows for token in tokenize(*texts)],
+            batch_size=1000,
+        )
+
+
+def _replace_placement_tokens(rows):
+    """rows: (placement id, student id, company, position) tuples."""
+    rows = list(rows)
+    with transaction.atomic():
+        SearchToken.objects.filter(placement_id__in=[r[0] for r in rows]).delete()
+        SearchToken.objects.bulk_create(
+            [
+                SearchToken(placement_id=pid, student_id=sid, token=token)
+                for pid, sid, company, position in rows for token in tokenize(company, position)
+            ],
+            batch_size=1000,
+        )
+
+
+def index_students(student_ids, batch_size=500):
+    """Rebuild the name / email / account-name tokens of the given students."""
+    student_ids = list(student_ids)
+    for start in range(0, len(student_ids), batch_size):
+        _replace_student_tokens(
+            Student.objects.filter(pk__in=student_ids[start:start + batch_size]).values_list(
+                "id", "name", "email", "user__first_name", "user__last_name"
+            )
+        )
+
+
+def index_placements(placement_ids, batch_size=500):
+    """Rebuild the company / position tokens of the given placements."""
+    placement_ids = list(placement_ids)
+    for start in range(0, len(placement_ids), batch_size):
+        _replace_placement_tokens(
+            Placement.objects.filter(pk__in=placement_ids[start:start + batch_size]).values_list(
+                "id", "student_id", "company", "position"
+            )
+        )
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(post_save, sender=Student)
+def index_saved_student(sender, instance, created, update_fields=None, **kwargs):
+    if created or _touches(update_fields, STUDENT_FIELDS):
+        index_students([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    # a new user has no student yet; logins only save last_login
+    if not created and _touches(update_fields, USER_FIELDS):
+        index_students(Student.objects.filter(user=instance).values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Placement)
+def index_saved_placement(sender, instance, created, update_fields=None, **kwargs):
+    if created or _touches(update_fields, PLACEMENT_FIELDS):
+        _replace_placement_tokens([(instance.pk, instance.student_id, instance.company, instance.position)])
+
+
+# -------------------------
+# Queries
+# -------------------------
+def _words(q, limit=MAX_QUERY_WORDS):
+    # longest words first: they are the most selective
+    return sorted(tokenize(q), key=len, reverse=True)[:limit]
+
+
+def _nothing(q, field):
+    # a query of only punctuation has no words to match: it finds nothing,
+    # rather than everything (an empty query is no filter at all)
+    return Q(**{f"{field}__in": []}) if q and q.strip() else Q()
+
+
+def _matching_students(word):
+    # istartswith is a plain LIKE 'word%' on MySQL, so it can use the index
+    return SearchToken.objects.filter(token__istartswith=word, placement__isnull=True).values("student_id")
+
+
+def search_students(q, field="pk", any_word=False):
+    """
+    Q matching the students (`field` is the path to the student id) whose
+    name, email or account name has a word starting with every word of `q`
+    (with `any_word`, with at least one of them: a single token lookup).
+    """
+    words = _words(q, limit=None if any_word else MAX_QUERY_WORDS)
+    if not words:
+        return _nothing(q, field)
+    if any_word:
+        prefixes = Q()
+        for word in words:
+            prefixes |= Q(token__istartswith=word)
+        tokens = SearchToken.objects.filter(prefixes, placement__isnull=True).values("student_id")
+        return Q(**{f"{field}__in": tokens})
+
+    condition = Q()
+    for word in words:
+        condition &= Q(**{f"{field}__in": _matching_students(word)})
+    return condition
+
+
+def search_placements(q):
+    """Q matching the placements whose company, position or student matches every word of `q`."""
+    words = _words(q)
+    if not words:
+        return _nothing(q, "id")
+    condition = Q()
+    for word in words:
+        placement_ids = SearchToken.objects.filter(token__istartswith=word, placement__isnull=False).values("placement_id")
+        condition &= Q(id__in=placement_ids) | Q(student_id__in=_matching_students(word))
+    return condition
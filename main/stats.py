@@ -0,0 +1,263 @@
+"""
+College-wide and per-branch dashboard statistics.
+
+The TPO dashboards show the same numbers on every view: students, placed /
+in progress, average CGPA, placement count, package buckets and highest
+package. Instead of scanning Student and Placement each time, these live in
+one BranchStats row per branch:
+
+* single-row writes (signals, placement summary refresh, grade sheets)
+  adjust the affected row with ``UPDATE ... SET n = n + delta`` in the same
+  transaction;
+* bulk paths (the importer) recompute the branches they touched;
+* ``reconcile_stats()`` recomputes every row from the source tables. It runs
+  on the first read after ``STATS_RECONCILE_INTERVAL`` seconds, and can be
+  run from cron with ``manage.py reconcile_stats``, so any drift is corrected.
+
+Reads are one query over a table with a row per branch.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BranchStats, Placement, Student, bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+RECONCILED_KEY = "apts:stats-reconciled"
+
+STUDENT_COUNTERS = ("students", "placed", "in_progress", "with_pending", "cgpa_total")
+PLACEMENT_COUNTERS = ("placements", "packages_below_3", "packages_3_to_6", "packages_6_to_10", "packages_10_plus")
+
+# (chart label, counter, lower bound, upper bound) in LPA; lower bound inclusive
+PACKAGE_BUCKETS = [
+    ("<3", "packages_below_3", None, 3),
+    ("3-6", "packages_3_to_6", 3, 6),
+    ("6-10", "packages_6_to_10", 6, 10),
+    ("10+", "packages_10_plus", 10, None),
+]
+
+
+def bucket_filter(low, high, field="package_lpa"):
+    condition = Q()
+    if low is not None:
+        condition &= Q(**{f"{field}__gte": low})
+    if high is not None:
+        condition &= Q(**{f"{field}__lt": high})
+    return condition
+
+
+def package_bucket(package_lpa):
+    """The bucket counter a package (in LPA) falls into."""
+    for _, counter, low, high in PACKAGE_BUCKETS:
+        if (low is None or package_lpa >= low) and (high is None or package_lpa < high):
+            return counter
+
+
+def student_counters(state):
+    """Counter contributions of one student, from Student.stats_state()."""
+    branch, cgpa, status, pending_count = state
+    return branch, {
+        "students": 1,
+        "placed": int(status == Student.PLACED),
+        "in_progress": int(status == Student.IN_PROGRESS),
+        "with_pending": int(pending_count > 0),
+        "cgpa_total": cgpa or 0.0,
+    }
+
+
+# -------------------------
+# Incremental updates
+# -------------------------
+def apply_deltas(deltas, highest=None):
+    """
+    Add {branch: {counter: change}} to the stored counters and raise each
+    branch's highest_package to the values in `highest` ({branch: lpa}).
+    """
+    highest = highest or {}
+    for branch in set(deltas) | set(highest):
+        updates = {counter: F(counter) + change for counter, change in deltas.get(branch, {}).items() if change}
+        if branch in highest:
+            updates["highest_package"] = Greatest(F("highest_package"), highest[branch])
+        if not updates:
+            continue
+        rows = BranchStats.objects.filter(branch=branch)
+        if not rows.update(**updates):
+            BranchStats.objects.bulk_create([BranchStats(branch=branch)], ignore_conflicts=True)
+            rows.update(**updates)
+
+
+def record_student_change(old_state, new_state):
+    """Move the counters from a student's old stats_state() to the new one."""
+    if old_state == new_state:
+        return
+    if old_state is None or new_state is None or old_state[0] != new_state[0]:
+        # previous values unknown, or a branch move (its placements move too)
+        reconcile_stats(None if old_state is None else {s[0] for s in (old_state, new_state) if s})
+        return
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, state in ((-1, old_state), (1, new_state)):
+        branch, counters = student_counters(state)
+        for counter, value in counters.items():
+            deltas[branch][counter] += sign * value
+    apply_deltas(deltas)
+
+
+def refresh_highest(branches):
+    """Recompute highest_package for `branches` (after a top package went down)."""
+    maxima = dict(
+        Placement.objects.filter(student__branch__in=branches)
+        .values("student__branch").annotate(top=Max("package_lpa"))
+        .values_list("student__branch", "top")
+    )
+    for branch in branches:
+        BranchStats.objects.filter(branch=branch).update(highest_package=maxima.get(branch) or 0.0)
+
+
+def _branch_of(student_id):
+    return Student.objects.filter(pk=student_id).values_list("branch", flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    new_state = instance.stats_state()
+    if created:
+        branch, counters = student_counters(new_state)
+        apply_deltas({branch: counters})
+    else:
+        record_student_change(getattr(instance, "_stats_state", None), new_state)
+    instance._stats_state = new_state
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    # its placements were deleted with it, so recompute the whole branch
+    state = instance.stats_state()
+    reconcile_stats({state[0]} if state else None)
+
+
+@receiver(post_save, sender=Placement)
+def placement_saved(sender, instance, created, **kwargs):
+    old_student_id, old_lpa = (None, None) if created else getattr(instance, "_stats_state", (None, None))
+    instance._stats_state = (instance.student_id, instance.package_lpa)
+    if not created and (old_student_id, old_lpa) == instance._stats_state:
+        return
+
+    branch = _branch_of(instance.student_id)
+    if not created and old_student_id != instance.student_id:
+        # unknown previous values, or moved to another student
+        reconcile_stats({branch, _branch_of(old_student_id)} - {None} if old_student_id else None)
+        return
+
+    deltas = defaultdict(int)
+    deltas[package_bucket(instance.package_lpa)] += 1
+    if created:
+        deltas["placements"] += 1
+    else:
+        deltas[package_bucket(old_lpa)] -= 1
+    apply_deltas({branch: deltas}, highest={branch: instance.package_lpa})
+    if not created and old_lpa > instance.package_lpa:
+        refresh_highest([branch])
+
+
+@receiver(post_delete, sender=Placement)
+def placement_deleted(sender, instance, **kwargs):
+    branch = _branch_of(instance.student_id)
+    if branch is None:
+        return  # deleted with its student; student_deleted recomputes the branch
+    apply_deltas({branch: {"placements": -1, package_bucket(instance.package_lpa): -1}})
+    if BranchStats.objects.filter(branch=branch, highest_package__lte=instance.package_lpa).exists():
+        refresh_highest([branch])
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+def reconcile_stats(branches=None):
+    """
+    Recompute the counters of `branches` (all branches when None) from the
+    Student and Placement tables: two grouped aggregates and one upsert.
+    """
+    students = Student.objects.all()
+    placements = Placement.objects.all()
+    if branches is not None:
+        branches = set(branches)
+        students = students.filter(branch__in=branches)
+        placements = placements.filter(student__branch__in=branches)
+
+    rows = defaultdict(dict)
+    for row in students.values("branch").annotate(
+        students=Count("id"),
+        placed=Count("id", filter=Q(placement_status=Student.PLACED)),
+        in_progress=Count("id", filter=Q(placement_status=Student.IN_PROGRESS)),
+        with_pending=Count("id", filter=Q(pending_count__gt=0)),
+        cgpa_total=Sum("cgpa"),
+    ).order_by():
+        rows[row.pop("branch")].update(row)
+    for row in placements.values("student__branch").annotate(
+        placements=Count("id"),
+        highest_package=Max("package_lpa"),
+        **{counter: Count("id", filter=bucket_filter(low, high)) for _, counter, low, high in PACKAGE_BUCKETS},
+    ).order_by():
+        rows[row.pop("student__branch")].update(row)
+
+    fields = [*STUDENT_COUNTERS, *PLACEMENT_COUNTERS, "highest_package"]
+    with transaction.atomic():
+        bulk_upsert(
+            BranchStats,
+            [BranchStats(branch=branch, **{f: values.get(f) or 0 for f in fields}) for branch, values in rows.items()],
+            unique_fields=["branch"],
+            update_fields=fields,
+        )
+        stale = BranchStats.objects.exclude(branch__in=rows)
+        if branches is not None:
+            stale = stale.filter(branch__in=branches)
+        stale.delete()
+
+    if branches is None:
+        cache.set(RECONCILED_KEY, True, getattr(settings, "STATS_RECONCILE_INTERVAL", 60 * 60))
+        logger.info("Dashboard stats reconciled for %d branches", len(rows))
+
+
+# -------------------------
+# Reads
+# -------------------------
+def branch_names():
+    """The branches that have students, from the stored counters (no scan of the students table)."""
+    return list(BranchStats.objects.filter(students__gt=0).order_by("branch").values_list("branch", flat=True))
+
+
+def dashboard_stats(branch=None):
+    """College-wide (or one branch's) dashboard numbers from the stored counters."""
+    if cache.get(RECONCILED_KEY) is None:
+        reconcile_stats()
+
+    rows = BranchStats.objects.all()
+    if branch is not None:
+        rows = rows.filter(branch=branch)
+    totals = rows.aggregate(
+        **{counter: Sum(counter) for counter in (*STUDENT_COUNTERS, *PLACEMENT_COUNTERS)},
+        highest_package=Max("highest_package"),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+
+    students = totals["students"]
+    return {
+        "total_students": students,
+        "placed": totals["placed"],
+        "not_placed": students - totals["placed"],
+        "in_progress": totals["in_progress"],
+        "with_pending": totals["with_pending"],
+        "avg_cgpa": round(totals["cgpa_total"] / students, 2) if students else 0,
+        "placements": totals["placements"],
+        "highest_package": round(totals["highest_package"], 2),
+        "buckets": {label: totals[counter] for label, counter, _, _ in PACKAGE_BUCKETS},
+    }
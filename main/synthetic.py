@@ -0,0 +1,138 @@
+"""
+Synthetic college data for scale tests and benchmarks.
+
+generate_college() writes a reproducible college (same seed, same rows):
+mentors, student accounts with all 8 Semester rows, placements and a TPO
+account, in batches of bulk inserts. Like the importer, it bypasses the
+post_save receivers, so it provisions semesters, placement summaries,
+search tokens and dashboard stats explicitly.
+
+All generated usernames start with ``PREFIX``. Generate into a scratch
+database (``manage.py benchmark --sizes`` does this for you): the rows are
+not meant to be mixed with real data.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import (
+    SEMESTER_COUNT,
+    Mentor,
+    Placement,
+    Profile,
+    Semester,
+    Student,
+    recompute_cgpa,
+    refresh_placement_summaries,
+)
+from .search import index_placements, index_students
+from .stats import reconcile_stats
+from .versioning import bump_all_versions
+
+PREFIX = "synthetic-"
+TPO_USERNAME = f"{PREFIX}tpo"
+
+BRANCHES = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT", "CHEM", "BIO", "AERO", "META"]
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Kabir", "Ananya", "Rohan", "Saanvi", "Vivaan", "Zara",
+               "Arjun", "Kiara", "Dev", "Nisha", "Reyansh", "Tara", "Aditya", "Priya", "Yash", "Leela"]
+LAST_NAMES = ["Sharma", "Iyer", "Patel", "Reddy", "Khan", "Das", "Menon", "Gupta", "Singh", "Rao",
+              "Joshi", "Nair", "Bose", "Kapoor", "Verma", "Pillai", "Shah", "Mehta", "Chopra", "Naidu"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+             "Cyberdyne", "Soylent", "Tyrell", "Wonka", "Aperture", "Vandelay", "Pied Piper", "Massive Dynamic"]
+POSITIONS = ["Software Engineer", "Data Analyst", "QA Engineer", "Design Engineer", "Consultant",
+             "Product Analyst", "Site Engineer", "Research Intern"]
+STATUSES = ["Accepted", "Pending", "Rejected"]
+
+
+def _create_accounts(usernames, user_type, rng):
+    """Create users + profiles; returns {username: user id}."""
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(username=u, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+             email=f"{u}@example.com", password=password)
+        for u in usernames
+    ])
+    # MySQL does not return the ids of bulk-inserted rows
+    user_ids = dict(User.objects.filter(username__in=usernames).values_list("username", "id"))
+    Profile.objects.bulk_create([Profile(user_id=user_ids[u], user_type=user_type) for u in usernames])
+    return user_ids
+
+
+def _placements(student_id, average, rng):
+    for _ in range(rng.randint(0, 2 * average)):
+        if rng.random() < 0.15:
+            package, unit = round(rng.uniform(150, 950), 0), "K"
+        else:
+            package, unit = round(rng.lognormvariate(1.8, 0.5), 1), "LPA"
+        yield Placement(
+            student_id=student_id, company=rng.choice(COMPANIES), position=rng.choice(POSITIONS),
+            package=package, package_unit=unit, package_lpa=Placement.normalize_package(package, unit),
+            status=rng.choices(STATUSES, weights=[4, 3, 3])[0],
+        )
+
+
+def generate_college(students=1000, mentors=50, branches=6, placements_per_student=1, seed=0,
+                     batch_size=2000, progress=None):
+    """
+    Create `students` students spread over `branches` branches and `mentors`
+    mentors, with about `placements_per_student` placements each (0 to
+    twice that). `progress`, if given, is called with the number of
+    students written after every batch.
+    """
+    if Student.objects.filter(user__username__startswith=PREFIX).exists():
+        raise ValueError("This database already has a synthetic college; use an empty one.")
+
+    rng = random.Random(seed)
+    branch_names = [BRANCHES[i] if i < len(BRANCHES) else f"BR{i}" for i in range(branches)]
+
+    with transaction.atomic():
+        _create_accounts([TPO_USERNAME], "tpo", rng)
+        mentor_names = [f"{PREFIX}m{n}" for n in range(mentors)]
+        user_ids = _create_accounts(mentor_names, "mentor", rng)
+        Mentor.objects.bulk_create([
+            Mentor(user_id=user_ids[u], name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                   email=f"{u}@example.com", department=rng.choice(branch_names))
+            for u in mentor_names
+        ])
+    mentor_ids = sorted(Mentor.objects.filter(user_id__in=user_ids.values()).values_list("id", flat=True))
+
+    written = 0
+    for start in range(0, students, batch_size):
+        usernames = [f"{PREFIX}s{n}" for n in range(start, min(start + batch_size, students))]
+        with transaction.atomic():
+            user_ids = _create_accounts(usernames, "student", rng)
+            Student.objects.bulk_create([
+                Student(user_id=user_ids[u], name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                        email=f"{u}@example.com", branch=rng.choice(branch_names),
+                        mentor_id=rng.choice(mentor_ids) if mentor_ids and rng.random() < 0.9 else None,
+                        attendance=rng.randint(55, 100), credits=rng.randint(0, 160),
+                        current_semester=rng.randint(1, SEMESTER_COUNT))
+                for u in usernames
+            ])
+            current = dict(
+                Student.objects.filter(user_id__in=user_ids.values()).order_by("id").values_list("id", "current_semester")
+            )
+            student_ids = list(current)
+
+            # only completed semesters (before current_semester) have a GPA
+            Semester.objects.bulk_create([
+                Semester(student_id=sid, semester_number=n, gpa=round(rng.uniform(5.0, 10.0), 2) if n < current[sid] else 0.0)
+                for sid in student_ids for n in range(1, SEMESTER_COUNT + 1)
+            ], batch_size=batch_size)
+            recompute_cgpa(student_ids)
+
+            Placement.objects.bulk_create(
+                [p for sid in student_ids for p in _placements(sid, placements_per_student, rng)],
+                batch_size=batch_size,
+            )
+            refresh_placement_summaries(student_ids)
+            index_students(student_ids)
+            index_placements(Placement.objects.filter(student_id__in=student_ids).values_list("id", flat=True))
+        written += len(usernames)
+        if progress:
+            progress(written)
+
+    reconcile_stats()
+    bump_all_versions()
@@ -1,3 +1,1031 @@
-from django.test import TestCase
+import asyncio
+import csv
+import importlib
+import io
+import json
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.handlers.asgi import ASGIHandler
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import ai, ai_cache, importer, views
+from .benchmark import run_benchmarks
+from .instrumentation import QueryInstrumentationMiddleware, fingerprint
+from .pagination import KeysetPage, encode_cursor
+from .search import search_placements, search_students
+from .synthetic import generate_college
+from .stats import dashboard_stats, reconcile_stats
+from .ai_context import build_tpo_context
+from .versioning import scope_version
+from .models import (
+    BranchStats, Mentor, Profile, Placement, Semester, Student, batch_semester_provisioning, save_semester_gpas,
+)
+
+
+def make_student(username, mentor=None, branch="CSE", first_name="", last_name="", **fields):
+    user = User.objects.create(username=username, first_name=first_name, last_name=last_name)
+    return Student.objects.create(
+        user=user, name=username, email=f"{username}@example.com", branch=branch, mentor=mentor, **fields
+    )
+
+
+def make_mentor(username="mentor", name=None):
+    user = User.objects.create(username=username)
+    return Mentor.objects.create(user=user, name=name or username.title(), email=f"{username}@example.com")
+
+
+def make_tpo(username="tpo", **fields):
+    user = User.objects.create(username=username, **fields)
+    Profile.objects.create(user=user, user_type="tpo")
+    return user
+
+
+class CollegeTestCase(TestCase):
+    """
+    A TPO and a mentor on an empty cache. add_students() creates student000,
+    student001, ... shaped by the student_fields() and offer_fields() hooks.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.tpo = make_tpo()
+        self.mentor = make_mentor()
+
+    def student_fields(self, i):
+        """Extra make_student() arguments for student number i."""
+        return {}
+
+    def offer_fields(self, i):
+        """The fields of student number i's placement, or None for none."""
+        return None
+
+    def add_students(self, count, offset=0):
+        for i in range(offset, offset + count):
+            student = make_student(f"student{i:03}", **self.student_fields(i))
+            offer = self.offer_fields(i)
+            if offer:
+                Placement.objects.create(student=student, position="Dev", **offer)
+
+
+class TPOContextTests(CollegeTestCase):
+    # aggregates (3) + named students, their semesters and placements (3)
+    # + company placements (1) + branch / mentor roster (1)
+    QUERY_BUDGET = 8
+    PROMPT = "How are Student003 and Student007 doing at Acme? Compare CSE with Mentor"
+
+    def student_fields(self, i):
+        return {"mentor": self.mentor if i % 2 else None}
+
+    def offer_fields(self, i):
+        return {"company": "Acme", "package": 6}
+
+    def test_query_count_is_constant(self):
+        self.add_students(8)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            build_tpo_context(self.PROMPT)
+
+        self.add_students(30, offset=8)
+        with self.assertNumQueries(self.QUERY_BUDGET) as queries:
+            context = build_tpo_context(self.PROMPT)
+        # names are looked up by token prefix, never with a leading wildcard
+        self.assertFalse([q["sql"] for q in queries.captured_queries if "'%student" in q["sql"]])
+
+        self.assertEqual(context["overall"]["students"], 38)
+        self.assertEqual(
+            sorted(s["name"] for s in context["students_mentioned"]), ["student003", "student007"]
+        )
+        self.assertEqual(len(context["students_mentioned"][0]["semesters"]), 8)
+        self.assertEqual(len(context["placements_at_mentioned_companies"]), 38)
+        self.assertEqual(context["mentors"][0]["student_count"], 19)
+
+    @override_settings(AI_CONTEXT_TOKEN_BUDGET=300)
+    def test_context_is_trimmed_to_budget(self):
+        self.add_students(20)
+        context = build_tpo_context("Placements at Acme")
+
+        self.assertLessEqual(len(json.dumps(context)), 300 * 4)
+        self.assertIn("placements_at_mentioned_companies", context["omitted_rows"])
+
+
+@override_settings(AI_PROVIDER="fake", AI_FAKE_LATENCY=0)
+class FakeProviderAIViewTests(TestCase):
+    def setUp(self):
+        ai.reset_provider()
+        ai_cache.answers.clear()
+        self.addCleanup(ai.reset_provider)
+        self.student = make_student("asha")
+        self.client.force_login(self.student.user)
+
+    def ask(self):
+        return self.client.post(
+            reverse("student_ai_query", args=[self.student.id]),
+            data=json.dumps({"prompt": "How do I improve my CGPA?"}),
+            content_type="application/json",
+        )
+
+    def test_reply_is_deterministic_and_cached(self):
+        first = self.ask().json()
+        self.assertIn("Fake AI reply", first["reply"])
+        self.assertEqual(self.ask().json(), {**first, "cached": True})
+
+    def test_cache_counters_are_logged(self):
+        answers = ai_cache.AnswerCache(max_entries=1, log_every=4)
+        answers.get("a")
+        answers.set("a", "A")
+        answers.set("b", "B")  # evicts "a"
+        answers.get("a")
+        answers.get("b")
+        with self.assertLogs("main.ai_cache", "INFO") as logs:
+            answers.get("b")
+        self.assertEqual(
+            logs.output, ["INFO:main.ai_cache:AI answer cache: entries=1 hits=2 misses=2 evictions=1 hit_rate=0.500"]
+        )
+
+    async def stream(self, prompt):
+        """The (event, payload) pairs of a streamed answer to `prompt`."""
+        await self.async_client.aforce_login(self.student.user)
+        response = await self.async_client.post(
+            reverse("student_ai_query", args=[self.student.id]),
+            data=json.dumps({"prompt": prompt, "stream": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        events = []
+        async for chunk in response.streaming_content:
+            lines = chunk.decode().strip().split("\n")
+            event = lines[0][len("event: "):] if lines[0].startswith("event: ") else "message"
+            events.append((event, json.loads(lines[-1][len("data: "):])))
+        return events
+
+    async def test_streaming_reply(self):
+        events = await self.stream("Interview tips?")
+        # the reply arrives in several chunks, then a done event
+        self.assertEqual([event for event, _ in events], ["message"] * 5 + ["done"])
+        reply = "".join(payload["text"] for _, payload in events[:-1])
+        self.assertIn("Fake AI reply", reply)
+
+        # the same question again is replayed from the cache in one chunk
+        self.assertEqual(
+            await self.stream("interview  tips?"), [("message", {"text": reply}), ("done", {"cached": True})]
+        )
+
+    @override_settings(AI_MAX_CONCURRENT_REQUESTS=1, AI_QUEUE_TIMEOUT=0.05)
+    async def test_streaming_reply_when_busy(self):
+        slots = ai._call_slots()
+        await slots.acquire()
+        try:
+            events = await self.stream("Interview tips?")
+        finally:
+            slots.release()
+        self.assertEqual(events, [("error", {"error": views.AI_BUSY_REPLY})])
+        self.assertEqual(ai_cache.answers.stats()["entries"], 0)
+
+
+class FailingProvider(ai.AIProvider):
+    async def generate(self, contents):
+        raise ConnectionError("model unreachable")
+
+
+@override_settings(AI_PROVIDER="fake", AI_FAKE_LATENCY=0, AI_MAX_CONCURRENT_REQUESTS=1, AI_QUEUE_TIMEOUT=0.05)
+class AIConcurrencyTests(TestCase):
+    def setUp(self):
+        ai.reset_provider()
+        ai_cache.answers.clear()
+        self.addCleanup(ai.reset_provider)
+        self.student = make_student("asha")
+
+    async def test_busy_model_answers_503(self):
+        await self.async_client.aforce_login(self.student.user)
+        slots = ai._call_slots()
+        await slots.acquire()
+        try:
+            response = await self.async_client.post(
+                reverse("student_ai_query", args=[self.student.id]),
+                data=json.dumps({"prompt": "How do I improve my CGPA?"}),
+                content_type="application/json",
+            )
+        finally:
+            slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content), {"reply": views.AI_BUSY_REPLY})
+        # the busy reply is not cached, so the next question reaches the model
+        self.assertEqual(ai_cache.answers.stats()["entries"], 0)
+
+    async def test_slot_is_released_when_the_call_fails(self):
+        with self.settings(AI_PROVIDER="main.tests.FailingProvider"):
+            ai.reset_provider()
+            with self.assertRaises(ConnectionError):
+                await ai.generate("prompt")
+        self.assertFalse(ai._call_slots().locked())
+
+        ai.reset_provider()
+        self.assertIn("Fake AI reply", await ai.generate("prompt"))
+
+
+class ImporterTests(TestCase):
+    def run_import(self, kind, text, **kwargs):
+        return importer.import_file(kind, io.BytesIO(text.encode()), f"{kind}.csv", **kwargs)
+
+    def test_students_semesters_and_placements(self):
+        report = self.run_import(
+            "students",
+            "username,name,branch,current_semester\n"
+            + "".join(f"u{i},User {i},IT,3\n" for i in range(5))
+            + "u5,,IT,3\n",
+            batch_size=2,
+        )
+        self.assertEqual((report.rows, report.imported), (6, 5))
+        self.assertEqual(report.errors, [(7, "'name' (or first_name/last_name) is required")])
+        self.assertEqual(Semester.objects.filter(student__user__username="u0").count(), 8)
+
+        self.run_import("semesters", "username,semester_number,gpa\nu0,1,8\nu0,2,9\nu0,3,4\n")
+        self.assertEqual(Student.objects.get(user__username="u0").cgpa, 8.5)
+
+        placements = "username,company,position,package,package_unit,status\nu0,Acme,Dev,900,K,Accepted\n"
+        self.run_import("placements", placements)
+        self.run_import("placements", placements)  # re-import updates in place
+        student = Student.objects.get(user__username="u0")
+        self.assertEqual(student.placements.count(), 1)
+        self.assertEqual((student.placement_status, student.top_package_lpa), (Student.PLACED, 9.0))
+
+    def test_reimport_keeps_columns_the_file_lacks(self):
+        self.run_import("students", "username,name,branch,email,cgpa\nu0,User Zero,IT,u0@example.com,8.2\n")
+        self.run_import("students", "username,name,branch\nu0,User Nought,CSE\n")
+        student = Student.objects.select_related("user").get(user__username="u0")
+        self.assertEqual((student.name, student.branch, student.cgpa), ("User Nought", "CSE", 8.2))
+        self.assertEqual((student.email, student.user.email), ("u0@example.com", "u0@example.com"))
+
+    def test_cgpa_column_takes_precedence_over_semesters(self):
+        self.run_import("students", "username,name,branch,current_semester\nu0,User Zero,IT,2\n")
+        self.run_import("semesters", "username,semester_number,gpa\nu0,1,8\nu0,2,6\n")
+
+        def cgpa():
+            return Student.objects.get(user__username="u0").cgpa
+
+        # moving current_semester recomputes CGPA from the semesters...
+        self.run_import("students", "username,name,branch,current_semester\nu0,User Zero,IT,3\n")
+        self.assertEqual(cgpa(), 7.0)
+        # ...unless the file gives a CGPA, which is stored as given
+        self.run_import("students", "username,name,branch,current_semester,cgpa\nu0,User Zero,IT,3,9.1\n")
+        self.assertEqual(cgpa(), 9.1)
+        self.run_import("semesters", "username,semester_number,gpa\nu0,2,10\n")
+        self.assertEqual(cgpa(), 9.0)
+
+    def test_rows_for_staff_accounts_are_rejected(self):
+        make_tpo(first_name="Head")
+        User.objects.create(username="admin", is_superuser=True)
+
+        report = self.run_import("students", "username,name,branch\ntpo,Mallory,IT\nadmin,Mallory,IT\nu0,User Zero,IT\n")
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([line for line, _ in report.errors], [2, 3])
+        self.assertEqual(User.objects.get(username="tpo").first_name, "Head")
+        self.assertFalse(Student.objects.filter(user__username__in=["tpo", "admin"]).exists())
+
+    def test_non_finite_numbers_are_rejected(self):
+        report = self.run_import(
+            "students", "username,name,branch,cgpa,attendance\nu0,A,IT,nan,1\nu1,B,IT,1,inf\nu2,C,IT,-inf,1\nu3,D,IT,7,90\n"
+        )
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(report.errors, [
+            (2, "'cgpa' must be a number, got 'nan'"),
+            (3, "'attendance' must be a number, got 'inf'"),
+            (4, "'cgpa' must be a number, got '-inf'"),
+        ])
+
+    def test_non_utf8_upload_is_a_clean_error(self):
+        self.client.force_login(make_tpo())
+        upload = io.BytesIO("username,name,branch\nu0,Ren\u00e9e Caf\u00e9,IT\n".encode("cp1252"))
+        upload.name = "students.csv"
+
+        response = self.client.post(reverse("tpo_import"), {"kind": "students", "file": upload}, follow=True)
+        self.assertRedirects(response, reverse("tpo_dashboard"))
+        self.assertIn("File must be UTF-8 encoded CSV", [str(m) for m in response.context["messages"]][0])
+        self.assertFalse(Student.objects.exists())
+
+
+class SemesterProvisioningTests(TestCase):
+    def semester_queries(self, ctx):
+        return [q["sql"] for q in ctx.captured_queries if '"main_semester"' in q["sql"]]
+
+    def test_one_insert_per_student(self):
+        user = User.objects.create(username="solo")
+        with CaptureQueriesContext(connection) as ctx:
+            Student.objects.create(user=user, name="Solo", email="solo@example.com", branch="CSE")
+        self.assertEqual(len(self.semester_queries(ctx)), 1)
+        self.assertEqual(Semester.objects.filter(student__user=user).count(), 8)
+
+    def test_batch_provisioning(self):
+        users = [User.objects.create(username=f"b{i}") for i in range(5)]
+        with CaptureQueriesContext(connection) as ctx:
+            with batch_semester_provisioning():
+                for user in users:
+                    Student.objects.create(user=user, name=user.username, email="b@example.com", branch="CSE")
+        self.assertEqual(len(self.semester_queries(ctx)), 1)
+        self.assertEqual(Semester.objects.filter(student__user__in=users).count(), 40)
+
+    @override_settings(SEMESTER_PROVISIONING="lazy")
+    def test_lazy_provisioning(self):
+        student = make_student("lazy")
+        self.assertFalse(student.semesters.exists())
+        self.assertEqual([s.semester_number for s in student.ensure_semesters()], list(range(1, 9)))
+
+
+class AcademicUpdateTests(TestCase):
+    def test_grade_sheet_save(self):
+        student = make_student("grades")
+        # upsert + CGPA aggregate + student UPDATE + stats UPDATE (+ savepoint/release)
+        with self.assertNumQueries(6):
+            save_semester_gpas(student, {1: 8, 2: 9, 3: 7, 4: 2}, current_semester=4)
+
+        student.refresh_from_db()
+        self.assertEqual((student.current_semester, student.cgpa), (4, 8.0))
+        self.assertEqual(student.semesters.get(semester_number=4).gpa, 2)
+
+    def test_views_share_the_formula(self):
+        student = make_student("grades")
+        self.client.force_login(student.user)
+        self.client.post(reverse("update_cgpa", args=[student.id]), {
+            "current_sem": 3, "semester_number[]": [1, 2, 3], "gpa[]": [8, 9, 1],
+        })
+        student.refresh_from_db()
+        self.assertEqual(student.cgpa, 8.5)
+
+        self.client.post(reverse("update_semester_gpa", args=[student.id, 1]), {"gpa": 6})
+        student.refresh_from_db()
+        self.assertEqual(student.cgpa, 7.5)
+
+
+class MentorDashboardTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.mentor.user)
+
+    def student_fields(self, i):
+        return {"mentor": self.mentor, "cgpa": 6 + (i % 5) * 0.8}
+
+    def offer_fields(self, i):
+        if i % 2:
+            return {"company": "Acme", "package": i, "status": "Accepted"}
+
+    def test_stats_and_constant_queries(self):
+        self.add_students(5)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("mentor_dashboard"))
+        self.add_students(40, offset=5)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse("mentor_dashboard"), {"gpa": "high", "sort": "package_desc"})
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(response.context["total_students"], 45)
+        self.assertEqual(json.loads(response.context["buckets_json"]), {"<7.5": 0, "7.5-8.4": 0, "8.5+": 9})
+        page = response.context["students_page"]
+        self.assertEqual(page.paginator.count, 9)
+        self.assertEqual([s["top_package_lpa"] for s in page][:2], [39, 29])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_tpo())
+        student = make_student("placed")
+        for i in range(23):
+            # duplicate packages exercise the id tie-breaker
+            Placement.objects.create(student=student, company=f"C{i}", position="Dev", package=i // 3)
+
+    def walk(self, sort):
+        pages, params = [], {"sort": sort}
+        while True:
+            page = self.client.get(reverse("tpo_placements"), params).context["page_obj"]
+            pages.append([p.company for p in page])
+            if page.next_cursor is None:
+                return pages
+            params["cursor"] = page.next_cursor
+
+    def test_pages_cover_every_row_once(self):
+        pages = self.walk("package_desc")
+        rows = [c for page in pages for c in page]
+        self.assertEqual([len(p) for p in pages], [15, 8])
+        self.assertEqual(rows, [p.company for p in Placement.objects.order_by("-package_lpa", "-id")])
+
+    def test_previous_links_walk_back(self):
+        pages = self.walk("date_asc")
+        rows = [c for page in pages for c in page]
+        response = self.client.get(reverse("tpo_placements"), {"sort": "date_asc", "cursor": KeysetPage.LAST})
+        last = response.context["page_obj"]
+        self.assertEqual([p.company for p in last], rows[-15:])
+        first = self.client.get(
+            reverse("tpo_placements"), {"sort": "date_asc", "cursor": last.previous_cursor}
+        ).context["page_obj"]
+        self.assertEqual([p.company for p in first], rows[:8])
+        self.assertFalse(first.has_previous)
+
+    def test_bad_cursors_fall_back_to_the_first_page(self):
+        first = [p.company for p in self.client.get(reverse("tpo_placements"), {"sort": "package_desc"}).context["page_obj"]]
+        for sort, cursor in [
+            ("package_desc", encode_cursor("next", ["garbage", 1])),
+            ("date_desc", encode_cursor("next", ["not a date", 1])),
+            ("package_desc", encode_cursor("next", [1, 2, 3])),
+            ("package_desc", encode_cursor("next", [[1], {"a": 1}])),
+            ("package_desc", "!!not-base64!!"),
+        ]:
+            response = self.client.get(reverse("tpo_placements"), {"sort": sort, "cursor": cursor})
+            self.assertEqual(response.status_code, 200)
+            if sort == "package_desc":
+                self.assertEqual([p.company for p in response.context["page_obj"]], first)
+
+    def test_stats_follow_filters(self):
+        other = make_student("other", branch="ECE")
+        Placement.objects.create(student=other, company="Acme", position="QA", package=1200, package_unit="K", status="Accepted")
+        response = self.client.get(reverse("tpo_placements"), {"branch": "ECE"})
+
+        self.assertEqual(response.context["raw_placements_count"], 1)
+        self.assertEqual((response.context["total_students"], response.context["placed"]), (1, 1))
+        self.assertEqual(response.context["highest_package"], 12.0)
+        self.assertEqual(json.loads(response.context["buckets_json"]), {"<3": 0, "3-6": 0, "6-10": 0, "10+": 1})
+
+
+class DashboardStatsTests(TestCase):
+    def assertStatsMatchTables(self):
+        incremental = {b: dashboard_stats(b) for b in ("CSE", "ECE")}
+        reconcile_stats()
+        for branch, stats in incremental.items():
+            self.assertEqual(stats, dashboard_stats(branch), branch)
+
+    def test_incremental_updates_match_reconciliation(self):
+        students = [make_student(f"s{i}", branch=["CSE", "ECE"][i % 2]) for i in range(6)]
+        offers = [
+            Placement.objects.create(student=s, company="Acme", position="Dev", package=4 + i * 3, status="Pending")
+            for i, s in enumerate(students)
+        ]
+        offers[0].status = "Accepted"
+        offers[0].save()
+        offers[5].package = 1
+        offers[5].save()  # highest ECE package goes down
+        offers[3].delete()
+        save_semester_gpas(students[2], {1: 9.0}, current_semester=2)
+
+        students[4].branch = "ECE"
+        students[4].save()
+        students[1].delete()
+
+        stats = dashboard_stats("CSE")
+        self.assertEqual((stats["total_students"], stats["placed"], stats["placements"]), (2, 1, 2))
+        self.assertStatsMatchTables()
+        self.assertEqual(dashboard_stats()["total_students"], 5)
+
+
+class SearchTests(TestCase):
+    def test_prefix_words_and_reindex(self):
+        ada = make_student("ada")
+        ada.name = "Ada Lovelace"
+        ada.save()
+        alan = make_student("alan")
+        alan.name = "Alan Turing"
+        alan.save()
+        Placement.objects.create(student=alan, company="Acme Labs", position="Engineer", package=8, status="Accepted")
+
+        def students(q):
+            return set(Student.objects.filter(search_students(q)).values_list("name", flat=True))
+
+        self.assertEqual(students("a"), {"Ada Lovelace", "Alan Turing"})
+        self.assertEqual(students("LOVE ada"), {"Ada Lovelace"})
+        self.assertEqual(students("ada turing"), set())
+        self.assertEqual(students("?! -- ..."), set())
+        self.assertFalse(Placement.objects.filter(search_placements("&&")).exists())
+        self.assertEqual(len(students("")), 2)
+        self.assertEqual(Placement.objects.filter(search_placements("turing acm")).count(), 1)
+
+        ada.name = "Ada Byron"
+        ada.save(update_fields=["name"])
+        self.assertEqual(students("love"), set())
+        self.assertEqual(students("byr"), {"Ada Byron"})
+
+
+class QueryInstrumentationTests(TestCase):
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'a' LIMIT 21"),
+            fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = 'b''c' LIMIT 5"),
+        )
+
+    def test_counts_and_flags_repeated_queries(self):
+        ids = [make_student(f"s{i}").pk for i in range(3)]
+
+        def view(request):
+            for pk in ids:
+                Student.objects.get(pk=pk)
+            return HttpResponse("ok")
+
+        def streaming_view(request):
+            return StreamingHttpResponse(str(Student.objects.get(pk=pk)) for pk in ids)
+
+        middleware = QueryInstrumentationMiddleware(view)
+        middleware.threshold = 3
+        with self.assertLogs("main.instrumentation", "INFO") as logs:
+            response = middleware(RequestFactory().get("/"))
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertIn("queries=3", logs.output[0])
+        self.assertIn("Possible N+1", logs.output[1])
+
+        middleware.get_response = streaming_view
+        with self.assertLogs("main.instrumentation", "INFO") as logs:
+            response = middleware(RequestFactory().get("/"))
+            self.assertIn('desc="0 queries"', response["Server-Timing"])
+            b"".join(response.streaming_content)
+        self.assertIn("queries=3", logs.output[0])
+
+    async def test_async_views_are_not_adapted(self):
+        async def view(request):
+            await Student.objects.acount()
+            return HttpResponse("ok")
+
+        middleware = QueryInstrumentationMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs("main.instrumentation", "INFO") as logs:
+            response = await middleware(RequestFactory().get("/"))
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertIn("queries=1", logs.output[0])
+
+        # the ASGI handler would log this (with DEBUG on) for a sync-only middleware
+        with override_settings(DEBUG=True), self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class SyntheticCollegeTests(TestCase):
+    def test_generate_and_benchmark(self):
+        generate_college(students=30, mentors=3, branches=2, placements_per_student=2, batch_size=20)
+
+        self.assertEqual(Student.objects.count(), 30)
+        self.assertEqual(Semester.objects.count(), 30 * 8)
+        self.assertEqual(dashboard_stats()["placements"], Placement.objects.count())
+        with self.assertRaises(ValueError):
+            generate_college(students=1)
+
+        results = run_benchmarks(repeat=1, only=["tpo_placements", "build_student_context"])
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r["queries"] > 0 and r["peak_kib"] > 0 for r in results))
+
+
+class DashboardCacheTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asha = make_student("asha", mentor=self.mentor)
+        self.ravi = make_student("ravi", mentor=self.mentor)
+
+    def get(self, user, url):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_repeat_views_are_cached_until_a_write(self):
+        asha_url = reverse("std_dashboard", args=[self.asha.pk])
+        ravi_url = reverse("std_dashboard", args=[self.ravi.pk])
+        mentor_url = reverse("mentor_dashboard")
+
+        _, first = self.get(self.asha.user, asha_url)
+        _, repeat = self.get(self.asha.user, asha_url)
+        self.assertLess(repeat, first)
+        self.get(self.mentor.user, ravi_url)
+        self.get(self.mentor.user, mentor_url)
+        _, mentor_repeat = self.get(self.mentor.user, mentor_url)
+        _, ravi_repeat = self.get(self.mentor.user, ravi_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Placement.objects.create(student=self.asha, company="Initech", position="Dev", package=9, status="Accepted")
+
+        self.assertContains(self.get(self.asha.user, asha_url)[0], "Initech")
+        response, queries = self.get(self.mentor.user, mentor_url)
+        self.assertContains(response, "Initech")
+        self.assertGreater(queries, mentor_repeat)
+        # another student's page is still served from the cache
+        self.assertEqual(self.get(self.mentor.user, ravi_url)[1], ravi_repeat)
+
+    @override_settings(SEMESTER_PROVISIONING="lazy")
+    def test_access_is_checked_before_the_page_is_built(self):
+        lazy = make_student("lazy", mentor=self.mentor)
+        url = reverse("std_dashboard", args=[lazy.pk])
+        other_mentor = make_mentor("other")
+
+        for outsider in (self.asha.user, other_mentor.user):
+            self.client.force_login(outsider)
+            self.assertRedirects(self.client.get(url), reverse("home"), fetch_redirect_response=False)
+        # nothing was written (missing semesters) or cached for them
+        self.assertFalse(lazy.semesters.exists())
+
+        self.get(self.mentor.user, url)
+        self.assertEqual(lazy.semesters.count(), 8)
+
+
+class AdminChangelistTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+
+    def student_fields(self, i):
+        return {"branch": ["CSE", "ECE"][i % 2]}
+
+    def offer_fields(self, i):
+        return {"company": f"Co{i % 3}", "package": 5 + i, "status": "Accepted"}
+
+    def add_students(self, count, offset=0):
+        with self.captureOnCommitCallbacks(execute=True):  # bump the data version
+            super().add_students(count, offset)
+
+    def changelist_queries(self, model, params=None):
+        url = reverse(f"admin:main_{model}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.add_students(3)
+        small = [self.changelist_queries(model)[1] for model in ("student", "placement")]
+        self.add_students(20, offset=3)
+        large = [self.changelist_queries(model)[1] for model in ("student", "placement")]
+        self.assertEqual(small, large)
+
+        response, _ = self.changelist_queries("placement", {"company": "Co1", "q": "student01"})
+        self.assertEqual(response.context["cl"].result_count, 4)  # student010..student019 at Co1
+        self.assertContains(self.changelist_queries("student", {"branch": "ECE"})[0], "Sem 1: 0.0")
+
+    def test_student_search_covers_branch_and_mentor(self):
+        self.add_students(6)
+        mentor = make_mentor("rao", "Meera Rao")
+        Student.objects.filter(name__in=["student000", "student001"]).update(mentor=mentor)
+
+        def found(q):
+            response, _ = self.changelist_queries("student", {"q": q})
+            return sorted(s.name for s in response.context["cl"].result_list)
+
+        self.assertEqual(found("student001"), ["student001"])
+        self.assertEqual(found("ec"), ["student001", "student003", "student005"])
+        self.assertEqual(found("rao"), ["student000", "student001"])
+        self.assertEqual(found("meera ece"), ["student001"])  # every word must match something
+
+
+class TopOfferTests(TestCase):
+    def test_summary_prefetch_and_subquery_agree(self):
+        student = make_student("asha")
+        for package, unit, status in [(50, "K", "Accepted"), (12, "LPA", "Accepted"), (30, "LPA", "Pending"), (12, "LPA", "Accepted")]:
+            Placement.objects.create(student=student, company=f"{package}{unit}", position="Dev", package=package, package_unit=unit, status=status)
+        best = Placement.objects.filter(student=student, status="Accepted", package=12).order_by("id").first()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Student.objects.with_top_offer().get(pk=student.pk).top_offer, best)
+        with self.assertNumQueries(2):
+            self.assertEqual(Student.objects.prefetch_related("placements").get(pk=student.pk).top_offer, best)
+        with self.assertNumQueries(1):
+            live = Student.objects.annotate_top_offer().get(pk=student.pk).top_offer
+            self.assertEqual((live, live.company, live.package_lpa, live.student_id), (best, "12LPA", 12.0, student.pk))
+
+    def test_live_mode_ignores_a_stale_summary(self):
+        student = make_student("asha")
+        offer = Placement.objects.create(student=student, company="Acme", position="Dev", package=8, status="Accepted")
+        Student.objects.filter(pk=student.pk).update(placement_status=Student.NOT_PLACED, top_placement=None)
+
+        self.assertIsNone(Student.objects.with_top_offer().get(pk=student.pk).top_offer)
+        self.assertEqual(Student.objects.annotate_top_offer().get(pk=student.pk).top_offer, offer)
+        offer.delete()
+        self.assertIsNone(Student.objects.annotate_top_offer().get(pk=student.pk).top_offer)
+
+
+class ApiTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asha = make_student("asha", mentor=self.mentor)
+        for i, name in enumerate(["zoe", "Bala", "amit", "Chen", "bala"]):
+            make_student(f"student{i}", mentor=self.mentor, first_name=name)
+
+    def test_unchanged_poll_is_304_without_dashboard_queries(self):
+        self.client.force_login(self.asha.user)
+        url = reverse("api_student_summary", args=[self.asha.pk])
+        response = self.client.get(url, {"fields": "name,placement_status,top_offer"})
+        self.assertEqual(response.json(), {"name": "asha", "placement_status": Student.NOT_PLACED, "top_offer": None})
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        # session, user and the permission check only
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"fields": "name,placement_status,top_offer"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Placement.objects.create(student=self.asha, company="Initech", position="Dev", package=9, status="Accepted")
+        response = self.client.get(url, {"fields": "name,placement_status,top_offer"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["top_offer"]["company"], "Initech")
+        # the change came within the same second: If-Modified-Since alone must not validate
+        response = self.client.get(url, {"fields": "name,placement_status,top_offer"}, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_roster_cursor_fields_and_errors(self):
+        url = reverse("api_mentor_roster")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.mentor.user)
+
+        names, params = [], {"fields": "name", "limit": 4}
+        while True:
+            data = self.client.get(url, params).json()
+            self.assertTrue(all(row.keys() == {"name"} for row in data["results"]))
+            names += [row["name"] for row in data["results"]]
+            if data["next"] is None:
+                break
+            params["cursor"] = data["next"]
+        # the dashboard's order: case-insensitive account name, then id
+        self.assertEqual(names, [" ", "amit ", "Bala ", "bala ", "Chen ", "zoe "])
+        dashboard = self.client.get(reverse("mentor_dashboard")).context["students_page"]
+        self.assertEqual([s["name"] for s in dashboard], names)
+
+        self.assertEqual(self.client.get(url, {"fields": "name,salary"}).status_code, 400)
+        for cursor in ["!!not-base64!!", encode_cursor("next", ["garbage", 1]), encode_cursor("next", [1])]:
+            response = self.client.get(url, {"sort": "cgpa_desc", "cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.json())
+        self.assertEqual(self.client.get(reverse("api_tpo_stats")).status_code, 403)
+
+
+class PlacementSummaryTests(TestCase):
+    def setUp(self):
+        self.student = make_student("asha")
+
+    def summary(self):
+        return Student.objects.filter(pk=self.student.pk).values_list(
+            "placement_status", "accepted_count", "pending_count", "top_placement__company", "top_package_lpa"
+        ).get()
+
+    def test_follows_placement_writes(self):
+        acme = Placement.objects.create(student=self.student, company="Acme", position="Dev", package=8)
+        self.assertEqual(self.summary(), (Student.IN_PROGRESS, 0, 1, "Acme", 8.0))
+
+        Placement.objects.create(student=self.student, company="Globex", position="QA", package=650, package_unit="K", status="Accepted")
+        self.assertEqual(self.summary(), (Student.PLACED, 1, 1, "Globex", 6.5))
+
+        acme.status = "Accepted"
+        acme.save()
+        self.assertEqual(self.summary(), (Student.PLACED, 2, 0, "Acme", 8.0))
+
+        acme.delete()
+        self.assertEqual(self.summary(), (Student.PLACED, 1, 0, "Globex", 6.5))
+        Placement.objects.all().delete()  # a queryset delete still sends post_delete
+        self.assertEqual(self.summary(), (Student.NOT_PLACED, 0, 0, None, 0.0))
+
+    def test_moving_a_placement_refreshes_both_students(self):
+        other = make_student("ravi", branch="IT")
+        Placement.objects.create(student=self.student, company="Acme", position="Dev", package=8, status="Accepted")
+
+        placement = Placement.objects.get()
+        placement.student = other
+        placement.save()
+        self.assertEqual(self.summary(), (Student.NOT_PLACED, 0, 0, None, 0.0))
+        self.assertEqual(
+            Student.objects.filter(pk=other.pk).values_list("placement_status", "accepted_count").get(),
+            (Student.PLACED, 1),
+        )
+        self.assertEqual(dict(BranchStats.objects.values_list("branch", "placed")), {"CSE": 0, "IT": 1})
+        reconcile_stats()
+        self.assertEqual(dict(BranchStats.objects.values_list("branch", "placed")), {"CSE": 0, "IT": 1})
+
+    def test_stale_instance_save_keeps_the_summary(self):
+        stale = Student.objects.get(pk=self.student.pk)
+        Placement.objects.create(student=self.student, company="Acme", position="Dev", package=8, status="Accepted")
+        stale.attendance = 90
+        stale.save()
+        self.assertEqual(self.summary(), (Student.PLACED, 1, 0, "Acme", 8.0))
+        self.assertEqual(Student.objects.get(pk=self.student.pk).attendance, 90)
+
+    def test_backfill_migration(self):
+        backfill = importlib.import_module("main.migrations.0006_student_placement_summary").backfill_placement_summary
+        Placement.objects.create(student=self.student, company="Acme", position="Dev", package=900, package_unit="K")
+        Placement.objects.create(student=self.student, company="Globex", position="QA", package=7, status="Accepted")
+        Student.objects.update(placement_status=Student.NOT_PLACED, accepted_count=0, pending_count=0,
+                               top_placement=None, top_package_lpa=0)
+
+        backfill(django_apps, None)
+        self.assertEqual(self.summary(), (Student.PLACED, 1, 1, "Globex", 7.0))
+
+
+class BulkAssignMentorTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.tpo)
+        self.old, self.new = make_mentor("old"), make_mentor("new")
+        self.students = [make_student(f"s{i}", mentor=self.old) for i in range(20)]
+
+    def assign(self, ids):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("bulk_assign_mentor"), {"mentor_id": self.new.pk, "students[]": ids})
+        return response, len(queries)
+
+    def test_constant_queries_and_report(self):
+        ids = [str(s.pk) for s in self.students]
+        _, few = self.assign(ids[:2])
+        response, many = self.assign(ids + ["999999", "abc"])
+        self.assertEqual(few, many)
+        self.assertEqual(Student.objects.filter(mentor=self.new).count(), 20)
+
+        reported = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertEqual(reported[-2], "Assigned New to 18 student(s) (2 already assigned).")
+        self.assertEqual(reported[-1], "Unknown student ids skipped: 999999, abc")
+
+    def test_assign_a_whole_branch(self):
+        it = [make_student(f"it{i}", mentor=self.old, branch="IT") for i in range(60)]
+        self.assertContains(self.client.get(reverse("tpo_dashboard")), '<option value="IT">Every student in IT</option>')
+
+        # the ticked students of the page are ignored in favour of the branch
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("bulk_assign_mentor"), {"mentor_id": self.new.pk, "branch": "IT", "students[]": [self.students[0].pk]}
+            )
+        self.assertEqual(set(Student.objects.filter(mentor=self.new)), set(it))
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)], ["Assigned New to 60 student(s) (0 already assigned)."]
+        )
+
+        response = self.client.post(reverse("bulk_assign_mentor"), {"mentor_id": self.new.pk, "branch": "ECE"}, follow=True)
+        self.assertContains(response, "No students in branch ECE.")
+
+    def test_bumps_versions_after_commit(self):
+        scopes = [f"student:{self.students[0].pk}", f"mentor:{self.old.pk}", f"mentor:{self.new.pk}"]
+        before = [scope_version(scope) for scope in scopes]
+        untouched = scope_version(f"student:{self.students[1].pk}")
+        self.assign([str(self.students[0].pk)])
+
+        after = [scope_version(scope) for scope in scopes]
+        self.assertTrue(all(a != b for a, b in zip(before, after)))
+        self.assertEqual(scope_version(f"student:{self.students[1].pk}"), untouched)
+
+
+class TPODashboardTests(CollegeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.tpo)
+
+    def offer_fields(self, i):
+        # every third student placed, every third in progress, the rest not placed
+        if i % 3 < 2:
+            return {"company": "Acme", "package": 5, "status": "Accepted" if i % 3 == 0 else "Pending"}
+
+    def roster(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("tpo_dashboard"), params)
+        return response.context["students"], len(queries)
+
+    def test_status_filter_and_pagination_in_sql(self):
+        self.add_students(9)
+        _, small = self.roster(status="placed")
+        cache.clear()
+        self.add_students(111, offset=9)
+        page, large = self.roster(status="placed")
+
+        self.assertEqual(small, large)
+        self.assertEqual(page.paginator.count, 40)
+        self.assertTrue(all(s.placement_status == Student.PLACED for s in page))
+        self.assertEqual(self.roster(status="in-progress")[0].paginator.count, 40)
+        self.assertEqual(self.roster(status="not-placed")[0].paginator.count, 40)
+
+        # 50 per page; an out-of-range page shows the last one
+        self.assertEqual([len(self.roster(page=n)[0]) for n in (1, 2, 3)], [50, 50, 20])
+        last = self.roster(page=99)[0]
+        self.assertEqual((last.number, last[0].name), (3, "student100"))
+
+    def test_cached_view_does_not_touch_the_students_table(self):
+        self.add_students(3)
+        make_student("ravi", branch="IT")
+        self.client.get(reverse("tpo_dashboard"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("tpo_dashboard"))
+        self.assertEqual(response.context["branches"], ["CSE", "IT"])
+        self.assertFalse([q["sql"] for q in queries.captured_queries if '"main_student"' in q["sql"]])
+
+
+class PackageNormalizationTests(TestCase):
+    def test_package_lpa_follows_package_and_unit(self):
+        placement = Placement.objects.create(
+            student=make_student("asha"), company="Acme", position="Dev", package=950, package_unit="K"
+        )
+
+        def stored():
+            return Placement.objects.values_list("package_lpa", flat=True).get(pk=placement.pk)
+
+        self.assertEqual(stored(), 9.5)
+
+        placement.package, placement.package_unit = 12, "LPA"
+        placement.save(update_fields=["package", "package_unit"])
+        self.assertEqual(stored(), 12.0)
+
+        Placement.objects.update(package_lpa=0)
+        backfill = importlib.import_module("main.migrations.0007_placement_package_lpa").backfill_package_lpa
+        backfill(django_apps, None)
+        self.assertEqual(stored(), 12.0)
+
+    def test_sorting_compares_units(self):
+        self.client.force_login(make_tpo())
+        student = make_student("asha")
+        for company, package, unit in [("Small", 12, "LPA"), ("Large", 1500, "K"), ("Mid", 900, "K")]:
+            Placement.objects.create(student=student, company=company, position="Dev", package=package, package_unit=unit)
+
+        page = self.client.get(reverse("tpo_placements"), {"sort": "package_desc"}).context["page_obj"]
+        self.assertEqual([p.company for p in page], ["Large", "Small", "Mid"])
+        self.assertEqual(self.client.get(reverse("tpo_placements")).context["highest_package"], 15.0)
+
+
+class CSVExportTests(CollegeTestCase):
+    def student_fields(self, i):
+        return {"mentor": self.mentor, "first_name": f"First{i:03}", "last_name": "Last"}
+
+    def offer_fields(self, i):
+        if i % 2:
+            return {"company": "Acme", "package": 150 + i, "package_unit": "K", "status": "Accepted"}
+
+    def export(self, user, url_name, params=None):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name), params or {})
+            self.assertTrue(response.streaming)
+            rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        return rows, len(queries)
+
+    def test_exports_stream_every_row_in_constant_queries(self):
+        self.add_students(3)
+        small = [self.export(self.tpo, "export_students_csv")[1], self.export(self.mentor.user, "mentor_export_csv")[1]]
+        self.add_students(600, offset=3)  # more than one 500-row chunk
+        students, tpo_queries = self.export(self.tpo, "export_students_csv")
+        mentees, mentor_queries = self.export(self.mentor.user, "mentor_export_csv")
+
+        self.assertEqual(small, [tpo_queries, mentor_queries])
+        self.assertEqual((students[0][0], len(students)), ("Name", 604))
+        self.assertEqual(len(mentees), 604)
+        self.assertEqual(mentees[1][:2], ["First000 Last", "student000@example.com"])
+
+        placed, _ = self.export(self.mentor.user, "mentor_export_csv", {"status": "placed", "sort": "package_desc"})
+        self.assertEqual(len(placed), 302)
+        self.assertEqual(placed[1][5:], ["Acme", "Dev", "7.51"])
+
+        placements, _ = self.export(self.tpo, "export_placements_csv", {"status": "Accepted"})
+        self.assertEqual(len(placements), 302)
+        self.assertEqual(placements[1][5:9], ["751.0", "K", "7.51", "Accepted"])
+
+    def test_mentor_export_reads_keyset_chunks(self):
+        self.add_students(3)
+        self.client.force_login(self.mentor.user)
+        with CaptureQueriesContext(connection) as queries:
+            b"".join(self.client.get(reverse("mentor_export_csv"), {"sort": "cgpa_desc"}).streaming_content)
+        # bounded queries, not one result set the driver may buffer whole
+        rows_queries = [q["sql"] for q in queries.captured_queries if 'FROM "main_student"' in q["sql"]]
+        self.assertTrue(rows_queries)
+        self.assertTrue(all("LIMIT 2000" in sql for sql in rows_queries))
+
+    def asgi_get(self, user, url_name, on_first_chunk):
+        """
+        GET `url_name` as `user` through the ASGI handler and return the body,
+        calling on_first_chunk() as soon as the first part has been sent.
+        """
+        self.client.force_login(user)
+        # as the test client does, keep the handler from closing the test's connection
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+            "method": "GET", "path": reverse(url_name), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"cookie", f"sessionid={self.client.cookies['sessionid'].value}".encode())],
+            "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+        body = []
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # the client stays connected
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.assertEqual(message["status"], 200)
+            elif message.get("body"):
+                body.append(message["body"])
+                if len(body) == 1:
+                    await sync_to_async(on_first_chunk)()
+
+        async_to_sync(ASGIHandler())(scope, receive, send)
+        return list(csv.reader(io.StringIO(b"".join(body).decode())))
+
+    def test_exports_stream_under_asgi(self):
+        self.add_students(3)
+        # a student added after the first chunk went out is still exported:
+        # the rows are read while the response streams, not buffered first
+        students = self.asgi_get(self.tpo, "export_students_csv", lambda: make_student("zoe"))
+        self.assertEqual([row[0] for row in students], ["Name", "student000", "student001", "student002", "zoe"])
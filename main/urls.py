@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Authentication
@@ -31,11 +31,18 @@ urlpatterns = [
 
     path("tpo/bulk_assign/", views.bulk_assign_mentor, name="bulk_assign_mentor"),
     path("tpo/export/csv/", views.export_students_csv, name="export_students_csv"),
+    path("tpo/import/", views.tpo_import, name="tpo_import"),
     path("tpo/placements/", views.tpo_placements, name="tpo_placements"),
 
     path("tpo/placements/export/csv/", views.export_placements_csv, name="export_placements_csv"),
     path("tpo/ai/", views.tpo_ai_query, name="tpo_ai_query"),
     path("student/ai/<int:student_id>/", views.student_ai_query, name="student_ai_query"),
 
+    # Read-only JSON API (conditional GET, see main.api)
+    path("api/v1/students/<int:student_id>/", api.student_summary, name="api_student_summary"),
+    path("api/v1/mentor/students/", api.mentor_roster, name="api_mentor_roster"),
+    path("api/v1/tpo/stats/", api.tpo_stats, name="api_tpo_stats"),
+    path("api/v1/tpo/placements/", api.tpo_placements, name="api_tpo_placements"),
+
 
 ]
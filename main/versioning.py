@@ -0,0 +1,130 @@
+"""
+Data-version tokens for cached, data-derived results.
+
+The global token changes after every committed write to Student, Semester,
+Placement or Mentor (see the receivers in models.py), so anything cached
+under it can never be served after the data it was built from changed.
+
+Per-scope counters ("student:<id>", "mentor:<id>") are bumped only by
+writes that touch that student or one of that mentor's students, so a
+dashboard cached under its scope survives unrelated edits. Bulk writes
+that cannot name the scopes they touched call bump_all_versions(), which
+moves an epoch that is part of every scoped token.
+
+Counters live in the default cache: with several workers or nodes that
+must be a shared backend (Redis/Memcached) so they all see each bump.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DATA_VERSION_KEY = "apts:data-version"
+EPOCH_KEY = "apts:version-epoch"
+VIEW_CACHE_PREFIX = "apts:view:"
+MODIFIED_PREFIX = "apts:modified:"
+
+
+def _initial_version():
+    # If the counter is evicted or the cache restarts, start above any value
+    # handed out before so old entries are never matched again.
+    return int(time.time() * 1000)
+
+
+def data_version():
+    """Return the current data-version token."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+async def adata_version():
+    version = await cache.aget(DATA_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DATA_VERSION_KEY, _initial_version(), timeout=None)
+        version = await cache.aget(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Invalidate everything cached under the current token."""
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(DATA_VERSION_KEY, _initial_version(), timeout=None)
+
+
+# -------------------------
+# Scoped versions
+# -------------------------
+def _scope_key(scope):
+    return DATA_VERSION_KEY if scope == "global" else f"apts:version:{scope}"
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def scope_version(*scopes):
+    """
+    One token for the current version of every scope ("global",
+    "student:<id>", "mentor:<id>"); it changes when any of them is bumped.
+    One cache round trip when the counters exist.
+    """
+    keys = [EPOCH_KEY, *map(_scope_key, scopes)]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _initial_version(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return ".".join(str(versions.get(key)) for key in keys)
+
+
+def bump_versions(students=(), mentors=()):
+    """Invalidate what is cached for these students and mentors, and everything global."""
+    for student_id in set(students):
+        _incr(_scope_key(f"student:{student_id}"))
+    for mentor_id in set(mentors) - {None}:
+        _incr(_scope_key(f"mentor:{mentor_id}"))
+    bump_data_version()
+
+
+def bump_all_versions():
+    """Invalidate every scoped and global token (bulk writes)."""
+    _incr(EPOCH_KEY)
+    bump_data_version()
+
+
+def version_key(name, scopes, *parts):
+    """Hash of `name` and `parts` under the current version of `scopes`."""
+    token = repr((name, scope_version(*scopes), parts))
+    return hashlib.md5(token.encode()).hexdigest()
+
+
+def cached_build(key, build):
+    """build() cached under a version_key()."""
+    return cache.get_or_set(VIEW_CACHE_PREFIX + key, build, getattr(settings, "VIEW_CACHE_TIMEOUT", 60 * 60))
+
+
+def versioned_cache(name, scopes, build, *parts):
+    """
+    build() cached under `name` and `parts` until one of `scopes` is
+    bumped. The version is read before building, so a write that commits
+    during build() leaves the entry under a token that is no longer used.
+    """
+    return cached_build(version_key(name, scopes, *parts), build)
+
+
+def version_timestamp(key):
+    """
+    When a version_key() was first seen, as a Unix timestamp: the
+    Last-Modified of data that keeps no modification time of its own.
+    """
+    return cache.get_or_set(MODIFIED_PREFIX + key, lambda: int(time.time()), getattr(settings, "VIEW_CACHE_TIMEOUT", 60 * 60))
@@ -0,0 +1,50 @@
+// Streams an AI assistant reply (Server-Sent Events over a POST fetch) into
+// `target`, rendering the HTML progressively as chunks arrive.
+async function streamAIReply(url, prompt, csrfToken, target) {
+    const res = await fetch(url, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+            "X-CSRFToken": csrfToken
+        },
+        body: JSON.stringify({ prompt: prompt, stream: true })
+    });
+
+    if (!res.ok || !res.body) {
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.reply || "Error contacting AI server");
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let html = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            message.split("\n").forEach(line => {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            });
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === "error") throw new Error(payload.error);
+            if (payload.text) {
+                html += payload.text;
+                target.innerHTML = html;
+            }
+        }
+    }
+    return html;
+}